@@ -0,0 +1,182 @@
+"""Модуль пакетного выполнения скриптов в пуле процессов.
+
+Образ VFS загружается один раз, затем скрипты распределяются по пулу
+процессов. Каждый скрипт выполняется против собственной копии VFS:
+при запуске через fork рабочие процессы наследуют загруженное дерево
+(страницы памяти копируются ОС только при изменении), а копия для скрипта
+создается за O(1) через VFS.fork. Там, где fork недоступен, каждый рабочий
+процесс загружает образ сам один раз. Вывод и время выполнения каждого
+скрипта собираются в общий отчет.
+
+Запуск:
+    python batch_runner.py --vfs-path image.img [--jobs N] [--output-dir DIR] script...
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+from config import Config
+from emulator import ShellEmulator, load_vfs
+
+# VFS, загруженная до создания пула (наследуется рабочими процессами)
+_base_vfs = None
+_base_config = None
+
+
+class ScriptResult:
+    """Результат выполнения одного скрипта."""
+
+    __slots__ = ('script', 'ok', 'output', 'elapsed')
+
+    def __init__(self, script, ok, output, elapsed):
+        """
+        Инициализация результата.
+
+        Args:
+            script: Путь к скрипту
+            ok: Выполнен ли скрипт (False - файл не найден или не прочитан)
+            output: Вывод скрипта
+            elapsed: Время выполнения в секундах
+        """
+        self.script = script
+        self.ok = ok
+        self.output = output
+        self.elapsed = elapsed
+
+
+def _init_worker(config):
+    """
+    Подготовить рабочий процесс: загрузить образ, если он не унаследован через fork.
+
+    Args:
+        config: Конфигурация (путь к образу и параметры загрузки)
+    """
+    global _base_vfs, _base_config
+    _base_config = config
+    if _base_vfs is None:
+        _base_vfs = load_vfs(config)
+
+
+def _run_script(script):
+    """
+    Выполнить скрипт против собственной копии VFS (в рабочем процессе).
+
+    Args:
+        script: Путь к скрипту
+
+    Returns:
+        ScriptResult: Вывод и время выполнения
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        emulator = ShellEmulator(_base_config, vfs=_base_vfs.fork())
+        ok = emulator.script_runner.run_script(script)
+    return ScriptResult(script, ok, output.getvalue(), time.perf_counter() - start)
+
+
+class BatchRunner:
+    """Выполнение множества скриптов против копий одного образа VFS."""
+
+    def __init__(self, config, jobs=None):
+        """
+        Инициализация пакетного запуска.
+
+        Args:
+            config: Конфигурация эмулятора (путь к образу, --quiet и т.д.)
+            jobs: Число рабочих процессов (None - по числу ядер)
+        """
+        self.config = config
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def run(self, scripts):
+        """
+        Выполнить скрипты в пуле процессов.
+
+        Args:
+            scripts: Пути к скриптам
+
+        Returns:
+            list: ScriptResult в порядке scripts
+        """
+        global _base_vfs
+        if 'fork' in multiprocessing.get_all_start_methods():
+            # Образ загружается до fork и разделяется рабочими процессами
+            context = multiprocessing.get_context('fork')
+            _base_vfs = load_vfs(self.config)
+        else:
+            context = multiprocessing.get_context('spawn')
+
+        try:
+            with context.Pool(min(self.jobs, len(scripts)) or 1, _init_worker, (self.config,)) as pool:
+                results = pool.map(_run_script, scripts, chunksize=1)
+        finally:
+            _base_vfs = None
+        return results
+
+    @staticmethod
+    def report(results, elapsed):
+        """
+        Сформировать отчет о пакетном запуске.
+
+        Args:
+            results: Список ScriptResult
+            elapsed: Общее время запуска в секундах
+
+        Returns:
+            str: Отчет
+        """
+        lines = []
+        for result in results:
+            status = "OK" if result.ok else "ОШИБКА"
+            lines.append(f"{status:6} {result.elapsed * 1000:10.1f} мс  {result.script}")
+        total = sum(result.elapsed for result in results)
+        failed = sum(1 for result in results if not result.ok)
+        lines.append(f"Скриптов: {len(results)}, с ошибками: {failed}, "
+                     f"время: {elapsed:.3f} с (сумма по скриптам {total:.3f} с)")
+        return "\n".join(lines)
+
+
+def main(args=None):
+    """
+    Главная функция.
+
+    Args:
+        args: Список аргументов (если None, используется sys.argv)
+    """
+    parser = argparse.ArgumentParser(description='Пакетное выполнение скриптов эмулятора в пуле процессов')
+    parser.add_argument('scripts', nargs='+', help='Пути к скриптам')
+    parser.add_argument('--vfs-path', type=str, help='Путь к образу VFS (XML или бинарный)')
+    parser.add_argument('--jobs', type=int, default=None, help='Число рабочих процессов (по умолчанию - число ядер)')
+    parser.add_argument('--output-dir', type=str, help='Каталог для вывода скриптов (<имя скрипта>.out)')
+    parser.add_argument('--quiet', action='store_true', help='Не выводить приглашение перед командами')
+    parsed_args = parser.parse_args(args)
+
+    config = Config()
+    config.vfs_path = parsed_args.vfs_path
+    config.headless = True
+    config.quiet = parsed_args.quiet
+
+    start = time.perf_counter()
+    results = BatchRunner(config, parsed_args.jobs).run(parsed_args.scripts)
+    elapsed = time.perf_counter() - start
+
+    if parsed_args.output_dir:
+        os.makedirs(parsed_args.output_dir, exist_ok=True)
+        for index, result in enumerate(results):
+            name = f"{index:04d}_{os.path.basename(result.script)}.out"
+            with open(os.path.join(parsed_args.output_dir, name), 'w', encoding='utf-8') as f:
+                f.write(result.output)
+
+    print(BatchRunner.report(results, elapsed))
+    if any(not result.ok for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
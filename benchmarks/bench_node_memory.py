@@ -0,0 +1,71 @@
+"""Бенчмарк памяти: сколько байт занимает один узел VFS.
+
+Сравнивает прежнее представление узла (__dict__, строка прав, datetime)
+с текущим компактным (__slots__, числовой режим, общая метка времени).
+
+Запуск:
+    python benchmarks/bench_node_memory.py [количество_узлов]
+"""
+
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from vfs import File  # noqa: E402
+
+
+class LegacyFile:
+    """Прежнее представление файла (до перехода на __slots__)."""
+
+    def __init__(self, name, content="", permissions="644", owner="root", group="root"):
+        self.name = name
+        self._permissions = permissions
+        self.owner = owner
+        self.group = group
+        self.modified_time = datetime.now()
+        self.content = content
+
+
+def measure(factory, count):
+    """
+    Измерить объем памяти на один узел.
+
+    Args:
+        factory: Функция создания узла по номеру
+        count: Количество узлов
+
+    Returns:
+        float: Байт на узел
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Список ссылок на узлы к самим узлам не относится
+    list_overhead = sys.getsizeof(nodes)
+    return (after - before - list_overhead) / count
+
+
+def main():
+    """Главная функция."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    # Имена и владельцы создаются заново для каждого узла, как при разборе XML
+    def owner():
+        return ''.join(['us', 'er'])
+
+    legacy = measure(lambda i: LegacyFile(f"file{i}.txt", "", "644", owner(), owner()), count)
+    compact = measure(lambda i: File(f"file{i}.txt", "", "644", owner(), owner()), count)
+
+    print(f"Узлов: {count}")
+    print(f"До:    {legacy:8.1f} байт/узел")
+    print(f"После: {compact:8.1f} байт/узел")
+    print(f"Экономия: {(1 - compact / legacy) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Бенчмарк разбора команд: shlex.split против CommandParser.
+
+Сравнивает прежний разбор каждой строки через shlex.split с быстрым
+путем для строк без кавычек (без кэша) и с кэшем разобранных строк
+(повторяющиеся строки, как в циклах скриптов).
+
+Запуск:
+    python benchmarks/bench_parser.py [количество_строк]
+"""
+
+import os
+import shlex
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parser import CommandParser  # noqa: E402
+
+# Типичные строки скриптов: в основном без кавычек
+LINES = [
+    "ls -l /etc",
+    "cd /home/user/documents",
+    "tail -n 5 /var/log/syslog",
+    "chmod 755 /home/user/run.sh",
+    "tree /home",
+    "pwd",
+    'ls -la "/home/user/My Documents"',
+    "whoami",
+]
+
+
+def legacy_parse(input_line):
+    """Прежний разбор: shlex.split для каждой строки."""
+    input_line = input_line.strip()
+    if not input_line:
+        return None, []
+    try:
+        parts = shlex.split(input_line)
+    except ValueError:
+        parts = input_line.split()
+    if not parts:
+        return None, []
+    return parts[0], parts[1:]
+
+
+def measure(parse, lines):
+    """
+    Измерить время разбора строк.
+
+    Args:
+        parse: Функция разбора строки
+        lines: Строки
+
+    Returns:
+        float: Микросекунд на строку
+    """
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return (time.perf_counter() - start) / len(lines) * 1e6
+
+
+def main():
+    """Главная функция."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    # Повторяющиеся строки (цикл скрипта) и уникальные строки (промахи кэша)
+    repeated = [LINES[i % len(LINES)] for i in range(count)]
+    unique = [f"{LINES[i % len(LINES)]} arg{i}" for i in range(count)]
+
+    baseline = measure(legacy_parse, repeated)
+    print(f"shlex.split:                   {baseline:7.2f} мкс/строка")
+    for title, parse, lines in (
+        ("быстрый путь (уникальные)", CommandParser.parse, unique),
+        ("кэш (повторяющиеся)", CommandParser.parse, repeated),
+    ):
+        elapsed = measure(parse, lines)
+        print(f"{title:30s} {elapsed:7.2f} мкс/строка, ускорение x{baseline / elapsed:.1f}")
+    print(f"Кэш: {CommandParser.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Бенчмарк снимков VFS: память и время на снимок.
+
+Строит VFS с заданным числом узлов, затем многократно делает снимок и
+изменяет один файл. Сравнивает снимки с копированием при записи
+(VFS.snapshot) с полным копированием дерева (copy.deepcopy).
+
+Запуск:
+    python benchmarks/bench_snapshots.py [количество_узлов] [количество_снимков]
+"""
+
+import copy
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from vfs import VFS  # noqa: E402
+
+
+def build_vfs(node_count, files_per_dir=20):
+    """
+    Построить VFS с директориями по files_per_dir файлов.
+
+    Args:
+        node_count: Приблизительное число узлов
+        files_per_dir: Число файлов в каждой директории
+
+    Returns:
+        tuple: (VFS, список путей файлов)
+    """
+    vfs = VFS("user", cache_size=0)
+    paths = []
+    for d in range(max(1, node_count // (files_per_dir + 1))):
+        vfs.create_directory(f"/dir{d}")
+        for i in range(files_per_dir):
+            path = f"/dir{d}/file{i}.txt"
+            vfs.create_file(path, f"line {d}.{i}\n")
+            paths.append(path)
+    return vfs, paths
+
+
+def measure(vfs, paths, snapshot_count, take_snapshot):
+    """
+    Измерить память и время серии "снимок + изменение одного файла".
+
+    Args:
+        vfs: VFS объект
+        paths: Пути файлов для изменения
+        snapshot_count: Количество снимков
+        take_snapshot: Функция снимка: take_snapshot(vfs) -> снимок
+
+    Returns:
+        tuple: (память в МБ, время на снимок в мс)
+    """
+    rng = random.Random(0)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshots = []
+    for i in range(snapshot_count):
+        snapshots.append(take_snapshot(vfs))
+        vfs.write_file(rng.choice(paths), f"version {i}\n")
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory / (1024 * 1024), elapsed * 1000 / snapshot_count
+
+
+def main():
+    """Главная функция."""
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    snapshot_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    vfs, paths = build_vfs(node_count)
+    print(f"VFS: {node_count} узлов, {snapshot_count} снимков")
+
+    memory, per_snapshot = measure(vfs, paths, snapshot_count, VFS.snapshot)
+    print(f"snapshot  память: {memory:8.1f} МБ, на снимок: {per_snapshot:8.3f} мс")
+
+    # Полное копирование слишком медленное - меряем на меньшем числе снимков
+    deep_count = min(snapshot_count, 3)
+    memory, per_snapshot = measure(vfs, paths, deep_count, lambda v: copy.deepcopy(v.root))
+    print(f"deepcopy  память: {memory * snapshot_count / deep_count:8.1f} МБ "
+          f"(оценка по {deep_count}), на снимок: {per_snapshot:8.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
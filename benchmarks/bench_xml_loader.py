@@ -0,0 +1,84 @@
+"""Бенчмарк загрузки VFS из XML: пиковая память и время.
+
+Генерирует образ VFS с заданным числом узлов и сравнивает загрузку через
+ET.parse (полное дерево элементов) с потоковой загрузкой через iterparse.
+
+Запуск:
+    python benchmarks/bench_xml_loader.py [количество_узлов]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from vfs_loader import VFSLoader  # noqa: E402
+
+
+def generate_image(path, node_count, files_per_dir=20):
+    """
+    Сгенерировать XML образ VFS.
+
+    Args:
+        path: Путь к создаваемому файлу
+        node_count: Приблизительное число узлов
+        files_per_dir: Число файлов в каждой директории
+    """
+    dir_count = max(1, node_count // (files_per_dir + 1))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n<filesystem>\n")
+        f.write('  <directory name="/" permissions="755" owner="root" group="root">\n')
+        for d in range(dir_count):
+            f.write(f'    <directory name="dir{d}" permissions="755" owner="user" group="user">\n')
+            for i in range(files_per_dir):
+                f.write(f'      <file name="file{i}.txt" permissions="644" owner="user" group="user">\n')
+                f.write(f'        <content encoding="text">line {d}.{i}\n</content>\n')
+                f.write('      </file>\n')
+            f.write('    </directory>\n')
+        f.write('  </directory>\n</filesystem>\n')
+
+
+def measure(xml_path, streaming):
+    """
+    Измерить пиковую память и время загрузки.
+
+    Args:
+        xml_path: Путь к XML образу
+        streaming: Использовать потоковую загрузку
+
+    Returns:
+        tuple: (пиковая память в МБ, время в секундах, число файлов)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    vfs = VFSLoader.load_from_xml(xml_path, streaming=streaming)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed, vfs.root.file_count
+
+
+def main():
+    """Главная функция."""
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    fd, xml_path = tempfile.mkstemp(suffix='.xml')
+    os.close(fd)
+    try:
+        generate_image(xml_path, node_count)
+        print(f"Образ: {node_count} узлов, {os.path.getsize(xml_path) / (1024 * 1024):.1f} МБ")
+
+        for title, streaming in (("ET.parse", False), ("iterparse", True)):
+            peak, elapsed, files = measure(xml_path, streaming)
+            print(f"{title:10s} пик памяти: {peak:8.1f} МБ, время: {elapsed:6.2f} с, файлов: {files}")
+    finally:
+        os.remove(xml_path)
+
+
+if __name__ == "__main__":
+    main()
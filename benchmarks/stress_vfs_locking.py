@@ -0,0 +1,162 @@
+"""Стресс-тест блокировок VFS: параллельные читатели и писатели.
+
+Писатели в своих директориях создают, перезаписывают и удаляют файлы,
+меняют права и в транзакциях записывают пары файлов одним номером.
+Читатели читают файлы и списки директорий и проверяют, что не видят
+наполовину выполненных изменений. В конце агрегаты директорий и хэш
+Меркла сверяются с полным обходом дерева, выводится статистика блокировки.
+
+Запуск:
+    python benchmarks/stress_vfs_locking.py [читателей] [писателей] [секунд]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from vfs import VFS  # noqa: E402
+
+
+def writer(vfs, number, stop, counters):
+    """
+    Изменять директорию /w<number>, пока не выставлен stop.
+
+    Args:
+        vfs: Общая VFS
+        number: Номер писателя
+        stop: threading.Event окончания теста
+        counters: Список счетчиков операций по писателям
+    """
+    base = f"/w{number}"
+    vfs.create_directory(base)
+    step = 0
+    while not stop.is_set():
+        step += 1
+        line = f"{number}:{step}\n"
+        path = f"{base}/file{step % 8}"
+        if step % 5 == 0:
+            vfs.remove_node(path)
+        elif not vfs.write_file(path, line * (step % 16 + 1)):
+            vfs.create_file(path, line)
+        if step % 7 == 0:
+            vfs.chmod(base, "700" if step % 2 else "755")
+        with vfs.transaction():
+            vfs.create_file(f"{base}/pair.a", line)
+            vfs.create_file(f"{base}/pair.b", line)
+        counters[number] = step
+
+
+def reader(vfs, writers, stop, errors, counters, number):
+    """
+    Читать файлы писателей и проверять их согласованность.
+
+    Args:
+        vfs: Общая VFS
+        writers: Число писателей
+        stop: threading.Event окончания теста
+        errors: Список найденных нарушений
+        counters: Список счетчиков операций по читателям
+        number: Номер читателя
+    """
+    reads = 0
+    while not stop.is_set():
+        for w in range(writers):
+            base = f"/w{w}"
+            names = vfs.list_directory(base, show_hidden=True) or []
+            for name in names:
+                content = vfs.read_file(f"{base}/{name}")
+                # Файл могли удалить после list_directory - это допустимо
+                if content and len(set(content.splitlines())) != 1:
+                    errors.append(f"{base}/{name}: частично записанное содержимое")
+            with vfs.read_lock():
+                pair = vfs.read_file(f"{base}/pair.a"), vfs.read_file(f"{base}/pair.b")
+            if pair[0] != pair[1]:
+                errors.append(f"{base}: транзакция видна частично {pair}")
+            reads += 1
+        counters[number] = reads
+
+
+def check_tree(vfs):
+    """
+    Сверить агрегаты и хэш Меркла с полным обходом дерева.
+
+    Args:
+        vfs: VFS после остановки потоков
+
+    Returns:
+        list: Найденные нарушения
+    """
+    errors = []
+    stack = [vfs.root]
+    dirs = files = size = 0
+    while stack:
+        node = stack.pop()
+        for child in node.children.values():
+            if child.is_directory():
+                dirs += 1
+                stack.append(child)
+            else:
+                files += 1
+                size += child.get_size()
+    root = vfs.root
+    if (root.dir_count, root.file_count, root.total_bytes) != (dirs, files, size):
+        errors.append(f"агрегаты корня {(root.dir_count, root.file_count, root.total_bytes)} "
+                      f"!= обход {(dirs, files, size)}")
+
+    # Копия без кэшированных хэшей: хэш должен совпасть с кэшированным
+    fresh = VFS(vfs.username, cache_size=0)
+    for path in vfs.list_subtree('/'):
+        node = vfs.get_node(path)
+        if node.is_directory():
+            fresh.create_directory(path, node.permissions)
+        else:
+            fresh.create_file(path, node.read_bytes(), node.permissions)
+    fresh.root._mode = root._mode
+    if fresh.merkle_hash() != vfs.merkle_hash():
+        errors.append(f"хэш Меркла расходится с деревом: {vfs.diff(fresh)}")
+    return errors
+
+
+def main():
+    """Главная функция."""
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+
+    vfs = VFS("user")
+    stop = threading.Event()
+    errors = []
+    write_ops = [0] * writers
+    read_ops = [0] * readers
+    threads = [threading.Thread(target=writer, args=(vfs, w, stop, write_ops)) for w in range(writers)]
+    threads += [threading.Thread(target=reader, args=(vfs, writers, stop, errors, read_ops, r))
+                for r in range(readers)]
+
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    errors += check_tree(vfs)
+    print(f"Читателей: {readers}, писателей: {writers}, длительность: {duration} с")
+    print(f"Операций записи: {sum(write_ops)}, проходов чтения: {sum(read_ops)}")
+    for mode, stats in vfs.get_lock_stats().items():
+        average = stats['hold_time'] / stats['count'] * 1e6 if stats['count'] else 0.0
+        print(f"  {mode:5}: захватов {stats['count']:8}, ожидание {stats['wait_time']:7.3f} с, "
+              f"удержание в среднем {average:8.1f} мкс, максимум {stats['max_hold_time'] * 1e3:7.3f} мс")
+
+    if errors:
+        print(f"Нарушений: {len(errors)}")
+        for error in errors[:10]:
+            print(f"  {error}")
+        sys.exit(1)
+    print("Нарушений не найдено")
+
+
+if __name__ == "__main__":
+    main()
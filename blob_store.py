@@ -0,0 +1,160 @@
+"""Модуль хранилища содержимого файлов с адресацией по содержимому.
+
+Одинаковое содержимое файлов (конфиги, шаблоны, пустые логи в разных
+домашних директориях) хранится в одном экземпляре: хранилище отображает
+SHA-256 содержимого в объект bytes и считает ссылки на него. Файл при
+записи получает общий объект bytes, а при освобождении (замене
+содержимого или удалении узла) отпускает ссылку; блок без ссылок
+удаляется из хранилища.
+
+Содержимое, отображенное в память из бинарного образа (memoryview),
+в хранилище не попадает: оно разделяется через страничный кэш ОС, а
+одинаковое содержимое записывается в образ один раз (см. vfs_image).
+
+Хранилище потокобезопасно: ссылки отпускаются из File.__del__ в том
+потоке, который освободил узел последним.
+"""
+
+import hashlib
+import threading
+
+
+class BlobStore:
+    """Хранилище блоков содержимого: хэш -> bytes со счетчиком ссылок."""
+
+    def __init__(self):
+        """Инициализация пустого хранилища."""
+        self._blobs = {}
+        self._refs = {}
+        # Реентерабельная: сборщик мусора может вызвать File.__del__ (release)
+        # в том же потоке посреди acquire
+        self._lock = threading.RLock()
+        # Суммарный размер всех ссылок (сколько байт занимали бы копии без дедупликации)
+        self.logical_bytes = 0
+        # Суммарный размер уникальных блоков
+        self.stored_bytes = 0
+
+    @staticmethod
+    def digest(data):
+        """
+        Вычислить хэш содержимого.
+
+        Args:
+            data: Содержимое (bytes или memoryview)
+
+        Returns:
+            bytes: SHA-256 содержимого
+        """
+        return hashlib.sha256(data).digest()
+
+    def acquire(self, data):
+        """
+        Поместить содержимое в хранилище и взять ссылку на него.
+
+        Args:
+            data: Содержимое (bytes)
+
+        Returns:
+            tuple: (хэш, общий объект bytes с тем же содержимым)
+        """
+        digest = hashlib.sha256(data).digest()
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is None:
+                blob = self._blobs[digest] = data
+                self._refs[digest] = 1
+                self.stored_bytes += len(data)
+            else:
+                self._refs[digest] += 1
+            self.logical_bytes += len(blob)
+        return digest, blob
+
+    def retain(self, digest):
+        """
+        Взять дополнительную ссылку на блок (при копировании узла).
+
+        Args:
+            digest: Хэш блока, находящегося в хранилище
+        """
+        with self._lock:
+            self._refs[digest] += 1
+            self.logical_bytes += len(self._blobs[digest])
+
+    def release(self, digest):
+        """
+        Отпустить ссылку на блок; блок без ссылок удаляется.
+
+        Args:
+            digest: Хэш блока
+        """
+        with self._lock:
+            refs = self._refs.get(digest)
+            if refs is None:
+                return
+            size = len(self._blobs[digest])
+            self.logical_bytes -= size
+            if refs == 1:
+                del self._refs[digest]
+                del self._blobs[digest]
+                self.stored_bytes -= size
+            else:
+                self._refs[digest] = refs - 1
+
+    def get(self, digest):
+        """
+        Получить содержимое по хэшу.
+
+        Args:
+            digest: Хэш блока
+
+        Returns:
+            bytes или None
+        """
+        return self._blobs.get(digest)
+
+    def refcount(self, digest):
+        """Получить число ссылок на блок (0, если блока нет)."""
+        return self._refs.get(digest, 0)
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def __contains__(self, digest):
+        return digest in self._blobs
+
+    def get_stats(self):
+        """
+        Получить статистику дедупликации.
+
+        Returns:
+            dict: Число блоков и ссылок, хранимые и логические байты,
+                  сэкономленные байты и коэффициент дедупликации
+        """
+        with self._lock:
+            blobs = len(self._blobs)
+            references = sum(self._refs.values())
+            stored, logical = self.stored_bytes, self.logical_bytes
+        return {
+            'blobs': blobs,
+            'references': references,
+            'stored_bytes': stored,
+            'logical_bytes': logical,
+            'bytes_saved': logical - stored,
+            'dedup_ratio': logical / stored if stored else 1.0,
+        }
+
+    def report(self):
+        """
+        Сформировать строку отчета о дедупликации.
+
+        Returns:
+            str: Отчет
+        """
+        stats = self.get_stats()
+        return (f"Blob store: {stats['blobs']} блоков, {stats['references']} ссылок, "
+                f"{stats['stored_bytes']} байт хранится, {stats['bytes_saved']} байт сэкономлено "
+                f"(коэффициент {stats['dedup_ratio']:.2f})")
+
+
+# Общее хранилище содержимого файлов всех VFS процесса (по аналогии с sys.intern)
+STORE = BlobStore()
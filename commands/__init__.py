@@ -1 +1,34 @@
 """Модуль команд эмулятора командной оболочки."""
+
+from commands.ls import LsCommand
+from commands.cd import CdCommand
+from commands.exit import ExitCommand
+from commands.whoami import WhoamiCommand
+from commands.tail import TailCommand
+from commands.tree import TreeCommand
+from commands.chmod import ChmodCommand
+from commands.pwd import PwdCommand
+
+# Реестр команд: классы, экземпляры которых создаются для каждого эмулятора/сеанса
+COMMAND_CLASSES = [
+    LsCommand, CdCommand, ExitCommand,
+    WhoamiCommand, TailCommand, TreeCommand,
+    ChmodCommand, PwdCommand
+]
+
+
+def create_commands(emulator):
+    """
+    Создать экземпляры всех команд для эмулятора.
+
+    Args:
+        emulator: Объект с атрибутами session и running (эмулятор или соединение сервера)
+
+    Returns:
+        dict: Имя команды -> команда
+    """
+    commands = {}
+    for cmd_class in COMMAND_CLASSES:
+        cmd = cmd_class(emulator)
+        commands[cmd.name] = cmd
+    return commands
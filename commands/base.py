@@ -38,3 +38,54 @@ class Command(ABC):
     def description(self):
         """Описание команды."""
         return "Описание команды не указано"
+
+    def stream(self, args):
+        """
+        Выполнить команду, выдавая вывод по частям.
+
+        По умолчанию выполняет execute и выдает его результат целиком
+        (если он не пустой). Потребители вывода (эмулятор, скрипты, сервер)
+        выводят каждую часть отдельной строкой сразу после получения.
+
+        Args:
+            args: Список аргументов команды
+
+        Yields:
+            str: Часть вывода (строка или несколько строк без завершающего \\n)
+        """
+        result = self.execute(args)
+        if result:
+            yield result
+
+
+class StreamingCommand(Command):
+    """Базовый класс команд, выдающих вывод построчно.
+
+    Подклассы реализуют stream; execute собирает вывод в одну строку
+    для вызывающих, которым нужен результат целиком.
+    """
+
+    def execute(self, args):
+        """
+        Выполнить команду и собрать вывод stream в одну строку.
+
+        Args:
+            args: Список аргументов команды
+
+        Returns:
+            str: Результат выполнения команды
+        """
+        return '\n'.join(self.stream(args))
+
+    @abstractmethod
+    def stream(self, args):
+        """
+        Выполнить команду, выдавая вывод по строкам.
+
+        Args:
+            args: Список аргументов команды
+
+        Yields:
+            str: Строка вывода
+        """
+        pass
@@ -18,16 +18,16 @@ class CdCommand(Command):
         """Выполнить команду cd."""
         # Если аргументов нет, переходим в домашнюю директорию
         if not args:
-            # Используем VFS username, так как он может отличаться от системного
-            target_path = f"/home/{self.emulator.vfs.username}"
+            # Используем пользователя сеанса, так как он может отличаться от системного
+            target_path = self.emulator.session.home
             # Если такой директории нет, пробуем /home/user
-            if not self.emulator.vfs.get_node(target_path):
+            if not self.emulator.session.get_node(target_path):
                 target_path = "/home/user"
         else:
             target_path = args[0]
 
         # Пытаемся сменить директорию
-        if self.emulator.vfs.change_directory(target_path):
+        if self.emulator.session.change_directory(target_path):
             # Успешно сменили директорию
             return None  # Нет вывода при успехе
         else:
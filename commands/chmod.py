@@ -24,7 +24,7 @@ class ChmodCommand(Command):
         file_path = args[1]
 
         # Получаем узел
-        node = self.emulator.vfs.get_node(file_path)
+        node = self.emulator.session.get_node(file_path)
 
         if node is None:
             return f"chmod: не удается получить доступ к '{file_path}': Нет такого файла или каталога"
@@ -32,7 +32,7 @@ class ChmodCommand(Command):
         # Парсим и применяем права
         try:
             new_permissions = self._parse_and_apply_mode(mode, node.permissions)
-            node.permissions = new_permissions
+            self.emulator.session.chmod(file_path, new_permissions)
             return None  # Успешно, нет вывода
         except ValueError as e:
             return f"chmod: {e}"
@@ -1,9 +1,9 @@
 """Команда ls - список файлов и директорий."""
 
-from commands.base import Command
+from commands.base import StreamingCommand
 
 
-class LsCommand(Command):
+class LsCommand(StreamingCommand):
     """Команда для вывода списка файлов и директорий."""
 
     @property
@@ -14,8 +14,8 @@ class LsCommand(Command):
     def description(self):
         return "Вывод списка файлов и директорий"
 
-    def execute(self, args):
-        """Выполнить команду ls."""
+    def stream(self, args):
+        """Выполнить команду ls, выдавая вывод построчно."""
         # Парсим аргументы
         show_hidden = False
         show_long = False
@@ -34,32 +34,29 @@ class LsCommand(Command):
 
         # Если путь не указан, используем текущую директорию
         if target_path is None:
-            target_path = self.emulator.vfs.get_current_directory()
+            target_path = self.emulator.session.get_current_directory()
 
         # Получаем узел
-        node = self.emulator.vfs.get_node(target_path)
+        node = self.emulator.session.get_node(target_path)
 
         if node is None:
-            return f"ls: не удается получить доступ к '{target_path}': Нет такого файла или каталога"
+            yield f"ls: не удается получить доступ к '{target_path}': Нет такого файла или каталога"
+            return
 
         # Если это файл, просто выводим его имя
         if node.is_file():
             if show_long:
-                return self._format_long_entry(node)
+                yield self._format_long_entry(node)
             else:
-                return node.name
+                yield node.name
+            return
 
-        # Если это директория, выводим её содержимое
-        if node.is_directory():
-            children_names = node.list_children(show_hidden)
-
-            if not children_names:
-                return ""  # Пустая директория
-
-            if show_long:
-                return self._format_long_listing(node, children_names)
-            else:
-                return self._format_short_listing(children_names, node)
+        # Если это директория, выводим её содержимое (пустая директория - без вывода)
+        children_names = node.list_children(show_hidden)
+        if show_long:
+            yield from self._format_long_listing(node, children_names)
+        else:
+            yield from self._format_short_listing(children_names, node)
 
     def _format_short_listing(self, names, directory):
         """
@@ -69,8 +66,8 @@ class LsCommand(Command):
             names: Список имен файлов
             directory: Директория
 
-        Returns:
-            str: Отформатированный вывод
+        Yields:
+            str: Строка вывода (до 4 имен)
         """
         result = []
         for name in names:
@@ -80,8 +77,7 @@ class LsCommand(Command):
                 result.append(name)
             elif child and child.is_file():
                 # Исполняемые файлы выделяем - проверяем бит execute у любой группы (user/group/other)
-                is_executable = any(int(digit) & 1 for digit in child.permissions if digit.isdigit())
-                if is_executable:
+                if child.is_executable():
                     result.append(name + '*')
                 else:
                     result.append(name)
@@ -89,11 +85,8 @@ class LsCommand(Command):
                 result.append(name)
 
         # Выводим в несколько колонок (упрощенно - по 4 в строку)
-        output = []
         for i in range(0, len(result), 4):
-            output.append('  '.join(result[i:i+4]))
-
-        return '\n'.join(output)
+            yield '  '.join(result[i:i+4])
 
     def _format_long_listing(self, directory, names):
         """
@@ -103,16 +96,13 @@ class LsCommand(Command):
             directory: Директория
             names: Список имен файлов
 
-        Returns:
-            str: Отформатированный вывод
+        Yields:
+            str: Строка вывода для одного узла
         """
-        lines = []
         for name in names:
             child = directory.get_child(name)
             if child:
-                lines.append(self._format_long_entry(child))
-
-        return '\n'.join(lines)
+                yield self._format_long_entry(child)
 
     def _format_long_entry(self, node):
         """
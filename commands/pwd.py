@@ -16,4 +16,4 @@ class PwdCommand(Command):
 
     def execute(self, args):
         """Выполнить команду pwd."""
-        return self.emulator.vfs.get_current_directory()
+        return self.emulator.session.get_current_directory()
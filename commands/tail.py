@@ -1,9 +1,9 @@
 """Команда tail - вывод последних строк файла."""
 
-from commands.base import Command
+from commands.base import StreamingCommand
 
 
-class TailCommand(Command):
+class TailCommand(StreamingCommand):
     """Команда для вывода последних строк файла."""
 
     @property
@@ -14,10 +14,11 @@ class TailCommand(Command):
     def description(self):
         return "Вывод последних строк файла"
 
-    def execute(self, args):
-        """Выполнить команду tail."""
+    def stream(self, args):
+        """Выполнить команду tail, выдавая строки файла по одной."""
         # Параметры по умолчанию
         num_lines = 10
+        num_bytes = None
         file_path = None
 
         # Парсим аргументы
@@ -25,10 +26,18 @@ class TailCommand(Command):
         while i < len(args):
             if args[i] == '-n' and i + 1 < len(args):
                 try:
-                    num_lines = int(args[i + 1])
+                    num_lines = abs(int(args[i + 1]))
                     i += 2
                 except ValueError:
-                    return f"tail: неверное число строк: '{args[i + 1]}'"
+                    yield f"tail: неверное число строк: '{args[i + 1]}'"
+                    return
+            elif args[i] == '-c' and i + 1 < len(args):
+                try:
+                    num_bytes = abs(int(args[i + 1]))
+                    i += 2
+                except ValueError:
+                    yield f"tail: неверное число байт: '{args[i + 1]}'"
+                    return
             elif not args[i].startswith('-'):
                 file_path = args[i]
                 i += 1
@@ -37,27 +46,26 @@ class TailCommand(Command):
 
         # Проверка наличия имени файла
         if file_path is None:
-            return "tail: отсутствует операнд - имя файла"
+            yield "tail: отсутствует операнд - имя файла"
+            return
 
         # Получаем узел файла
-        node = self.emulator.vfs.get_node(file_path)
+        node = self.emulator.session.get_node(file_path)
 
         if node is None:
-            return f"tail: не удается открыть '{file_path}' для чтения: Нет такого файла или каталога"
+            yield f"tail: не удается открыть '{file_path}' для чтения: Нет такого файла или каталога"
+            return
 
         if not node.is_file():
-            return f"tail: ошибка чтения '{file_path}': Это каталог"
-
-        # Читаем содержимое файла
-        content = node.read()
-
-        # Разделяем на строки
-        lines = content.splitlines()
+            yield f"tail: ошибка чтения '{file_path}': Это каталог"
+            return
 
-        # Берем последние N строк
-        if num_lines >= len(lines):
-            result_lines = lines
-        else:
-            result_lines = lines[-num_lines:]
+        # Последние N байт
+        if num_bytes is not None:
+            data = node.tail_bytes(num_bytes)
+            if data:
+                yield data
+            return
 
-        return '\n'.join(result_lines)
+        # Последние N строк - файл просматривается с конца, без разбиения целиком
+        yield from node.tail_lines(num_lines)
@@ -3,6 +3,9 @@
 import argparse
 import sys
 
+# Адрес сервера сеансов по умолчанию (--serve без значения)
+DEFAULT_SERVE_ADDRESS = '127.0.0.1:7777'
+
 
 class Config:
     """Класс для хранения и обработки конфигурации эмулятора."""
@@ -12,6 +15,11 @@ class Config:
         self.vfs_path = None
         self.startup_script = None
         self.debug = False
+        self.lazy_vfs = False
+        self.vfs_cache = True
+        self.serve = None
+        self.headless = False
+        self.quiet = False
 
     @staticmethod
     def parse_args(args=None):
@@ -33,13 +41,17 @@ class Config:
   python emulator.py --vfs-path vfs_examples/minimal.xml
   python emulator.py --startup-script scripts/test_startup.txt
   python emulator.py --vfs-path vfs.xml --startup-script start.txt --debug
+  python emulator.py --headless --startup-script scripts/test_vfs.txt
+  python emulator.py --headless --quiet --startup-script big_script.txt
+  python emulator.py --vfs-path big.img --serve 127.0.0.1:7777
+  python emulator.py --serve unix:/tmp/vfs-shell.sock
             '''
         )
 
         parser.add_argument(
             '--vfs-path',
             type=str,
-            help='Путь к файлу виртуальной файловой системы (XML)'
+            help='Путь к файлу виртуальной файловой системы (XML или бинарный образ)'
         )
 
         parser.add_argument(
@@ -48,6 +60,39 @@ class Config:
             help='Путь к стартовому скрипту для выполнения команд'
         )
 
+        parser.add_argument(
+            '--lazy-vfs',
+            action='store_true',
+            help='Загружать директории образа VFS при первом обращении (бинарный образ или кэш XML)'
+        )
+
+        parser.add_argument(
+            '--no-vfs-cache',
+            action='store_true',
+            help='Не использовать дисковый кэш разобранного XML образа VFS'
+        )
+
+        parser.add_argument(
+            '--headless',
+            action='store_true',
+            help='Работать без окна: выполнить стартовый скрипт или команды из stdin'
+        )
+
+        parser.add_argument(
+            '--quiet',
+            action='store_true',
+            help='Не выводить приглашение перед командами скрипта и сообщить число команд в секунду'
+        )
+
+        parser.add_argument(
+            '--serve',
+            nargs='?',
+            const=DEFAULT_SERVE_ADDRESS,
+            metavar='ADDRESS',
+            help='Запустить сервер сеансов вместо окна: хост:порт или unix:путь '
+                 f'(по умолчанию {DEFAULT_SERVE_ADDRESS})'
+        )
+
         parser.add_argument(
             '--debug',
             action='store_true',
@@ -60,6 +105,11 @@ class Config:
         config.vfs_path = parsed_args.vfs_path
         config.startup_script = parsed_args.startup_script
         config.debug = parsed_args.debug
+        config.lazy_vfs = parsed_args.lazy_vfs
+        config.vfs_cache = not parsed_args.no_vfs_cache
+        config.serve = parsed_args.serve
+        config.headless = parsed_args.headless
+        config.quiet = parsed_args.quiet
 
         return config
 
@@ -70,6 +120,11 @@ class Config:
         print("=" * 60)
         print(f"VFS Path: {self.vfs_path if self.vfs_path else 'По умолчанию (в памяти)'}")
         print(f"Startup Script: {self.startup_script if self.startup_script else 'Не указан'}")
+        print(f"Lazy VFS: {'Включен' if self.lazy_vfs else 'Выключен'}")
+        print(f"VFS Cache: {'Включен' if self.vfs_cache else 'Выключен'}")
+        print(f"Headless: {'Включен' if self.headless else 'Выключен'}")
+        print(f"Quiet: {'Включен' if self.quiet else 'Выключен'}")
+        print(f"Serve: {self.serve if self.serve else 'Не запущен'}")
         print(f"Debug Mode: {'Включен' if self.debug else 'Выключен'}")
         print("=" * 60)
         print()
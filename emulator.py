@@ -1,8 +1,12 @@
 """Главный модуль эмулятора командной оболочки UNIX."""
 
-import tkinter as tk
-from tkinter import scrolledtext
+import time
+
+# Момент запуска (до импорта остальных модулей) - для замера времени старта
+_STARTED = time.perf_counter()
+
 import platform
+import sys
 import getpass
 import socket
 from parser import CommandParser
@@ -10,76 +14,90 @@ from config import Config
 from script_runner import ScriptRunner
 from vfs import VFS
 from vfs_loader import VFSLoader
-from commands.ls import LsCommand
-from commands.cd import CdCommand
-from commands.exit import ExitCommand
-from commands.whoami import WhoamiCommand
-from commands.tail import TailCommand
-from commands.tree import TreeCommand
-from commands.chmod import ChmodCommand
-from commands.pwd import PwdCommand
+from image_cache import ImageCache
+from blob_store import STORE
+from commands import create_commands
+
+# Модули tkinter импортируются только при создании окна (см. _import_tkinter)
+tk = None
+scrolledtext = None
+
+
+def _import_tkinter():
+    """Импортировать tkinter при первом создании окна (в режиме --headless не нужен)."""
+    global tk, scrolledtext
+    if tk is None:
+        import tkinter
+        from tkinter import scrolledtext as tk_scrolledtext
+        tk, scrolledtext = tkinter, tk_scrolledtext
+
+
+def load_vfs(config):
+    """
+    Загрузить VFS согласно конфигурации.
+
+    Args:
+        config: Объект конфигурации (Config)
+
+    Returns:
+        VFS: Загруженная VFS или VFS по умолчанию
+    """
+    if config.vfs_path:
+        # При загрузке из файла всегда используем "user" как username
+        # Формат (XML или бинарный образ) определяется автоматически
+        cache = ImageCache() if config.vfs_cache else None
+        vfs = VFSLoader.load(config.vfs_path, "user", lazy=config.lazy_vfs, cache=cache)
+        if config.debug and cache is not None and cache.last_status:
+            print(f"VFS cache: {cache.last_status} ({cache.cache_dir})")
+        if config.debug:
+            print(STORE.report())
+        return vfs
+
+    # Для VFS по умолчанию используем системное имя пользователя
+    system_username = getpass.getuser()
+    return VFSLoader.create_default_vfs(system_username)
 
 
 class ShellEmulator:
     """Эмулятор командной оболочки UNIX с графическим интерфейсом."""
 
-    def __init__(self, config=None):
+    # Число строк вывода команды, добавляемых в окно за одно обновление
+    OUTPUT_BATCH_LINES = 256
+
+    def __init__(self, config=None, vfs=None):
         """Инициализация эмулятора.
 
         Args:
             config: Объект конфигурации (Config)
+            vfs: Уже загруженная VFS, разделяемая с другими эмуляторами (None - загрузить)
         """
         self.config = config if config else Config()
         self.running = True
         self.hostname = socket.gethostname()
 
         # Инициализация VFS
-        if self.config.vfs_path:
-            # При загрузке из XML всегда используем "user" как username
-            self.vfs = VFSLoader.load_from_xml(self.config.vfs_path, "user")
-        else:
-            # Для VFS по умолчанию используем системное имя пользователя
-            system_username = getpass.getuser()
-            self.vfs = VFSLoader.create_default_vfs(system_username)
-
-        # Устанавливаем текущую директорию в домашнюю
-        # Используем username из VFS, а не системный
-        home_dir = f"/home/{self.vfs.username}"
-        if not self.vfs.get_node(home_dir):
-            # Если нет /home/username, пробуем /home/user
-            home_dir = "/home/user"
-
-        if self.vfs.get_node(home_dir):
-            self.vfs.change_directory(home_dir)
-        else:
-            # Fallback to root if home doesn't exist
-            self.vfs.change_directory("/")
+        self.vfs = vfs if vfs is not None else load_vfs(self.config)
+
+        # Собственный сеанс: текущая директория и история не влияют на другие
+        # эмуляторы той же VFS. Сеанс начинается в домашней директории
+        # пользователя VFS, /home/user или в корне
+        self.session = self.vfs.open_session()
 
         # Инициализация команд
-        self.commands = {}
-        self._register_commands()
+        self.commands = create_commands(self)
 
         # Script runner
-        self.script_runner = ScriptRunner(self)
-
-        # Инициализация GUI
-        self._init_gui()
-
-    def _register_commands(self):
-        """Регистрация всех доступных команд."""
-        command_classes = [
-            LsCommand, CdCommand, ExitCommand,
-            WhoamiCommand, TailCommand, TreeCommand,
-            ChmodCommand, PwdCommand
-        ]
-        for cmd_class in command_classes:
-            cmd = cmd_class(self)
-            self.commands[cmd.name] = cmd
+        self.script_runner = ScriptRunner(self, quiet=self.config.quiet)
+
+        # Инициализация GUI (в режиме --headless окно не создается)
+        if not self.config.headless:
+            self._init_gui()
 
     def _init_gui(self):
         """Инициализация графического интерфейса."""
+        _import_tkinter()
         self.root = tk.Tk()
-        self.root.title(f"Эмулятор - [{self.vfs.username}@{self.hostname}]")
+        self.root.title(f"Эмулятор - [{self.session.username}@{self.hostname}]")
         self.root.geometry("800x600")
 
         # Текстовое поле для вывода
@@ -122,7 +140,7 @@ class ShellEmulator:
         self.input_entry.focus()
 
         # История команд
-        self.history = []
+        self.history = self.session.history
         self.history_index = 0
         self.input_entry.bind("<Up>", self._history_up)
         self.input_entry.bind("<Down>", self._history_down)
@@ -130,22 +148,12 @@ class ShellEmulator:
         # Приветственное сообщение
         self._print_output("Эмулятор командной оболочки UNIX")
         self._print_output(f"Система: {platform.system()} {platform.release()}")
-        self._print_output(f"Пользователь: {self.vfs.username}@{self.hostname}")
+        self._print_output(f"Пользователь: {self.session.username}@{self.hostname}")
         self._print_output("Введите 'exit' для выхода\n")
 
     def _get_prompt(self):
         """Получить строку приглашения командной строки."""
-        current_dir = self.vfs.get_current_directory()
-        # Сокращаем путь если это домашняя директория
-        # Используем vfs.username, так как он может отличаться от системного username
-        vfs_home = f"/home/{self.vfs.username}"
-        if current_dir.startswith(vfs_home):
-            display_dir = "~" + current_dir[len(vfs_home):]
-            if not display_dir or display_dir == "~":
-                display_dir = "~"
-        else:
-            display_dir = current_dir
-        return f"[{self.vfs.username}@{self.hostname} {display_dir}]$ "
+        return self.session.prompt(self.hostname)
 
     def _update_prompt(self):
         """Обновить строку приглашения."""
@@ -204,12 +212,19 @@ class ShellEmulator:
             return
 
         if command in self.commands:
+            # Вывод команды добавляется в окно пачками по мере получения
+            batch = []
             try:
-                result = self.commands[command].execute(args)
-                if result:
-                    self._print_output(result)
+                for chunk in self.commands[command].stream(args):
+                    batch.append(chunk)
+                    if len(batch) >= self.OUTPUT_BATCH_LINES:
+                        self._print_output('\n'.join(batch))
+                        batch = []
+                        self.root.update_idletasks()
             except Exception as e:
-                self._print_output(f"Ошибка выполнения команды: {e}")
+                batch.append(f"Ошибка выполнения команды: {e}")
+            if batch:
+                self._print_output('\n'.join(batch))
         else:
             self._print_output(f"{command}: команда не найдена")
 
@@ -222,15 +237,24 @@ class ShellEmulator:
             command_line (str): Строка с командой
         """
         command, args = CommandParser.parse(command_line)
+        self._execute_parsed_silent(command, args)
+
+    def _execute_parsed_silent(self, command, args):
+        """
+        Выполнить уже разобранную команду с выводом в консоль (для скриптов).
 
+        Args:
+            command (str): Имя команды или None для пустой строки
+            args (list): Аргументы команды
+        """
         if command is None:
             return
 
         if command in self.commands:
             try:
-                result = self.commands[command].execute(args)
-                if result:
-                    print(result)
+                # Вывод печатается по частям, не дожидаясь завершения команды
+                for chunk in self.commands[command].stream(args):
+                    print(chunk)
             except Exception as e:
                 print(f"Ошибка выполнения команды: {e}")
         else:
@@ -255,6 +279,10 @@ class ShellEmulator:
 
     def run(self):
         """Запустить эмулятор."""
+        if self.config.headless:
+            self.run_headless()
+            return
+
         # Выполнить стартовый скрипт если указан
         if self.config.startup_script:
             # Откладываем выполнение скрипта, чтобы GUI успел загрузиться
@@ -262,6 +290,28 @@ class ShellEmulator:
 
         self.root.mainloop()
 
+    def run_headless(self):
+        """Выполнить стартовый скрипт или команды из stdin без окна."""
+        if self.config.startup_script:
+            self.script_runner.run_script(self.config.startup_script)
+            return
+
+        # Приглашение выводится только при вводе с терминала
+        interactive = sys.stdin.isatty()
+        while self.running:
+            if interactive:
+                try:
+                    command_line = input(self._get_prompt())
+                except EOFError:
+                    break
+            else:
+                command_line = sys.stdin.readline()
+                if not command_line:
+                    break
+            if command_line.strip():
+                self.session.history.append(command_line.strip())
+            self._execute_command_silent(command_line)
+
 
 def main():
     """Главная функция."""
@@ -272,8 +322,17 @@ def main():
     if config.debug:
         config.print_debug_info()
 
+    # Режим сервера: много сеансов над одной VFS без окна
+    if config.serve:
+        # asyncio нужен только серверу - не замедляет обычный запуск
+        import shell_server
+        shell_server.run(load_vfs(config), config.serve, config.debug)
+        return
+
     # Создаем и запускаем эмулятор
     emulator = ShellEmulator(config)
+    if config.debug:
+        print(f"Время запуска: {(time.perf_counter() - _STARTED) * 1000:.1f} мс")
     emulator.run()
 
 
@@ -0,0 +1,173 @@
+"""Модуль дискового кэша разобранных образов VFS.
+
+Разобранный XML сохраняется в бинарный образ (vfs_image) и при следующем
+запуске загружается из него, если исходный файл не изменился. Исходный
+файл идентифицируется путем, размером, временем изменения и SHA-256
+содержимого: при совпадении размера и времени хэш не пересчитывается,
+при несовпадении - сравнивается хэш (файл мог быть просто "тронут").
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import vfs_image
+
+# Каталог кэша по умолчанию (можно переопределить переменной окружения)
+CACHE_DIR_ENV = 'VFS_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vfs-emulator')
+
+
+class ImageCache:
+    """Кэш бинарных образов, построенных из XML файлов VFS."""
+
+    def __init__(self, cache_dir=None):
+        """
+        Инициализация кэша.
+
+        Args:
+            cache_dir: Каталог кэша (по умолчанию $VFS_CACHE_DIR или ~/.cache/vfs-emulator)
+        """
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+        # Результат последнего обращения: 'hit', 'miss' или 'error'
+        self.last_status = None
+
+    def _entry_paths(self, source_path):
+        """
+        Получить пути образа и метаданных для исходного файла.
+
+        Args:
+            source_path: Путь к исходному XML файлу
+
+        Returns:
+            tuple: (путь к образу, путь к файлу метаданных)
+        """
+        key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.img', base + '.json'
+
+    @staticmethod
+    def _fingerprint(source_path, with_hash=True):
+        """
+        Получить отпечаток исходного файла.
+
+        Args:
+            source_path: Путь к исходному файлу
+            with_hash: Вычислять ли SHA-256 содержимого
+
+        Returns:
+            dict: Путь, размер, время изменения и (опционально) хэш
+        """
+        stat = os.stat(source_path)
+        fingerprint = {
+            'path': os.path.abspath(source_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        if with_hash:
+            digest = hashlib.sha256()
+            with open(source_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            fingerprint['sha256'] = digest.hexdigest()
+        return fingerprint
+
+    def lookup(self, source_path):
+        """
+        Найти актуальный образ для исходного файла.
+
+        Args:
+            source_path: Путь к исходному XML файлу
+
+        Returns:
+            str или None: Путь к образу, если он соответствует исходному файлу
+        """
+        image_path, meta_path = self._entry_paths(source_path)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if not vfs_image.is_image(image_path):
+                return None
+
+            current = self._fingerprint(source_path, with_hash=False)
+            if all(meta.get(key) == value for key, value in current.items()):
+                return image_path
+
+            # Размер или время изменились - решает хэш содержимого
+            current = self._fingerprint(source_path)
+            if meta.get('sha256') != current['sha256']:
+                return None
+            self._write_meta(meta_path, current)
+            return image_path
+
+        except (OSError, ValueError):
+            return None
+
+    def store(self, source_path, vfs):
+        """
+        Сохранить разобранную VFS в кэш.
+
+        Args:
+            source_path: Путь к исходному XML файлу
+            vfs: VFS, загруженная из этого файла
+        """
+        image_path, meta_path = self._entry_paths(source_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fingerprint = self._fingerprint(source_path)
+
+        # Образ пишется во временный файл и атомарно подменяет старый
+        vfs_image.write_image(vfs, image_path)
+        self._write_meta(meta_path, fingerprint)
+
+    @staticmethod
+    def _write_meta(meta_path, fingerprint):
+        """
+        Записать метаданные записи кэша.
+
+        Args:
+            meta_path: Путь к файлу метаданных
+            fingerprint: Отпечаток исходного файла
+        """
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(fingerprint, f)
+        os.replace(tmp_path, meta_path)
+
+    def load(self, source_path, loader, username="user", lazy=False):
+        """
+        Загрузить VFS из кэша или разобрать исходный файл и обновить кэш.
+
+        Args:
+            source_path: Путь к исходному XML файлу
+            loader: Функция загрузки исходного файла: loader(path, username) -> VFS
+            username: Имя пользователя
+            lazy: Отложенная загрузка директорий образа из кэша
+
+        Returns:
+            VFS: Загруженная виртуальная файловая система
+        """
+        image_path = self.lookup(source_path)
+        if image_path is not None:
+            try:
+                # В XML нет времени изменения: разбор ставит узлам время загрузки,
+                # поэтому и образ из кэша загружается с текущим временем
+                reader = vfs_image.ImageReader(image_path, mtime=int(time.time()))
+                vfs = reader.load(username, lazy)
+                self.hits += 1
+                self.last_status = 'hit'
+                return vfs
+            except (OSError, ValueError):
+                pass
+
+        self.misses += 1
+        self.last_status = 'miss'
+        vfs = loader(source_path, username)
+        try:
+            self.store(source_path, vfs)
+        except OSError as e:
+            self.last_status = 'error'
+            print(f"Не удалось сохранить кэш VFS: {e}")
+        return vfs
@@ -1,11 +1,22 @@
 """Парсер команд для эмулятора командной оболочки."""
 
+import functools
+import re
 import shlex
 
+# Символы, при которых строку нужно разбирать через shlex (кавычки и экранирование)
+_NEEDS_SHLEX = re.compile(r'[\'"\\]')
+
+# Слово без кавычек: разделители те же, что у shlex
+_WORD = re.compile(r'[^ \t\r\n]+')
+
 
 class CommandParser:
     """Парсер для разбора введенных пользователем команд."""
 
+    # Число последних разобранных строк в кэше
+    CACHE_SIZE = 1024
+
     @staticmethod
     def parse(input_line):
         """
@@ -17,25 +28,54 @@ class CommandParser:
         Returns:
             tuple: (команда, список_аргументов) или (None, []) если строка пустая
         """
+        parts = _split(input_line)
+
+        if not parts:
+            return None, []
+
+        # Аргументы копируются: кэшированный результат не должен меняться вызывающим
+        return parts[0], list(parts[1:])
+
+    @staticmethod
+    def cache_info():
+        """Получить статистику кэша разобранных строк (functools.lru_cache)."""
+        return _split.cache_info()
+
+    @staticmethod
+    def tokenize(input_line):
+        """
+        Разбить строку на слова без кэширования.
+
+        Строки без кавычек и обратной косой черты разбиваются по пробельным
+        символам напрямую, остальные - через shlex.
+
+        Args:
+            input_line (str): Строка ввода пользователя
+
+        Returns:
+            list: Слова строки
+        """
         # Убираем пробелы в начале и конце
         input_line = input_line.strip()
 
-        # Если строка пустая, возвращаем None
+        # Если строка пустая, возвращаем пустой список
         if not input_line:
-            return None, []
+            return []
+
+        if not _NEEDS_SHLEX.search(input_line):
+            # Быстрый путь: кавычек и экранирования нет
+            return _WORD.findall(input_line)
 
         try:
             # Используем shlex для корректной обработки кавычек и пробелов
-            parts = shlex.split(input_line)
+            return shlex.split(input_line)
         except ValueError:
             # В случае ошибки парсинга (незакрытые кавычки и т.д.)
             # Разделяем простым split
-            parts = input_line.split()
-
-        if not parts:
-            return None, []
+            return input_line.split()
 
-        command = parts[0]
-        args = parts[1:] if len(parts) > 1 else []
 
-        return command, args
+@functools.lru_cache(maxsize=CommandParser.CACHE_SIZE)
+def _split(input_line):
+    """Разбить строку на слова (кэшируется; результат - неизменяемый кортеж)."""
+    return tuple(CommandParser.tokenize(input_line))
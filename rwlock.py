@@ -0,0 +1,199 @@
+"""Модуль блокировки чтения/записи.
+
+Блокировка допускает много одновременных читателей или одного писателя.
+Ожидающий писатель не пропускает новых читателей, поэтому поток записей
+не голодает при постоянном чтении. Приоритет писателей ограничен: после
+освобождения записи сначала входят все читатели, ждавшие до этого момента,
+и только затем следующий писатель, поэтому при частых записях читатели
+ждут не дольше одной записи. Захват повторный: поток-писатель может
+снова брать блокировку записи и чтения, поток-читатель - блокировку чтения.
+Повышение чтения до записи запрещено (два таких потока ждали бы друг друга).
+
+Для каждого режима считается число захватов, суммарное время ожидания
+и суммарное/максимальное время удержания блокировки.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _HoldStats:
+    """Статистика захватов одного режима блокировки."""
+
+    __slots__ = ('count', 'wait_time', 'hold_time', 'max_hold_time')
+
+    def __init__(self):
+        self.count = 0
+        self.wait_time = 0.0
+        self.hold_time = 0.0
+        self.max_hold_time = 0.0
+
+    def record_hold(self, held):
+        """Учесть освобождение блокировки, удерживавшейся held секунд."""
+        self.hold_time += held
+        if held > self.max_hold_time:
+            self.max_hold_time = held
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'wait_time': self.wait_time,
+            'hold_time': self.hold_time,
+            'max_hold_time': self.max_hold_time,
+        }
+
+
+class RWLock:
+    """Повторно входимая блокировка чтения/записи с приоритетом писателей."""
+
+    def __init__(self):
+        """Инициализация свободной блокировки."""
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        # Ожидающие читатели, число освобождений записи и число читателей,
+        # ждавших к последнему освобождению: они входят раньше следующего писателя
+        self._waiting_readers = 0
+        self._write_releases = 0
+        self._phase_readers = 0
+        # Поток-владелец блокировки записи и глубина ее повторного захвата
+        self._writer = None
+        self._write_depth = 0
+        self._write_start = 0.0
+        # Глубина чтения потока, учтен ли он в _readers и время захвата
+        self._local = threading.local()
+        self._read_stats = _HoldStats()
+        self._write_stats = _HoldStats()
+
+    def acquire_read(self):
+        """Захватить блокировку чтения (ждет, пока пишет или ждет писатель)."""
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            if self._writer == threading.get_ident():
+                # Писатель читает под своей блокировкой записи
+                local.shared = False
+            else:
+                start = time.perf_counter()
+                with self._cond:
+                    # Номер освобождения записи, при котором читатель начал ждать
+                    ticket = None
+                    while self._writer is not None or (
+                            self._waiting_writers
+                            and (ticket is None or ticket == self._write_releases)):
+                        if ticket is None:
+                            ticket = self._write_releases
+                            self._waiting_readers += 1
+                        self._cond.wait()
+                    if ticket is not None:
+                        self._waiting_readers -= 1
+                        if ticket != self._write_releases and self._phase_readers:
+                            self._phase_readers -= 1
+                            if not self._phase_readers:
+                                # Все ждавшие читатели вошли - очередь писателей
+                                self._cond.notify_all()
+                    self._readers += 1
+                    local.start = time.perf_counter()
+                    self._read_stats.count += 1
+                    self._read_stats.wait_time += local.start - start
+                local.shared = True
+        local.depth = depth + 1
+
+    def release_read(self):
+        """Освободить блокировку чтения."""
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0 and local.shared:
+            held = time.perf_counter() - local.start
+            with self._cond:
+                self._readers -= 1
+                self._read_stats.record_hold(held)
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    def acquire_write(self):
+        """
+        Захватить блокировку записи (ждет ухода всех читателей и писателя).
+
+        Raises:
+            RuntimeError: Если поток удерживает блокировку чтения
+        """
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'depth', 0):
+            raise RuntimeError("нельзя захватить блокировку записи, удерживая блокировку чтения")
+
+        start = time.perf_counter()
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers or self._phase_readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+            self._write_start = time.perf_counter()
+            self._write_stats.count += 1
+            self._write_stats.wait_time += self._write_start - start
+
+    def release_write(self):
+        """
+        Освободить блокировку записи.
+
+        Raises:
+            RuntimeError: Если поток не владеет блокировкой записи
+        """
+        if self._writer != threading.get_ident():
+            raise RuntimeError("блокировка записи не захвачена этим потоком")
+        self._write_depth -= 1
+        if self._write_depth == 0:
+            held = time.perf_counter() - self._write_start
+            with self._cond:
+                self._writer = None
+                self._write_stats.record_hold(held)
+                self._write_releases += 1
+                self._phase_readers = self._waiting_readers
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Контекстный менеджер блокировки чтения."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Контекстный менеджер блокировки записи."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def is_write_locked(self):
+        """Проверить, удерживает ли текущий поток блокировку записи."""
+        return self._writer == threading.get_ident()
+
+    def get_stats(self):
+        """
+        Получить статистику захватов (времена в секундах).
+
+        Returns:
+            dict: {'read': {...}, 'write': {...}} с числом захватов, суммарным
+                  временем ожидания, суммарным и максимальным временем удержания
+        """
+        with self._cond:
+            return {'read': self._read_stats.as_dict(), 'write': self._write_stats.as_dict()}
+
+    def reset_stats(self):
+        """Обнулить статистику захватов."""
+        with self._cond:
+            self._read_stats = _HoldStats()
+            self._write_stats = _HoldStats()
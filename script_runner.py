@@ -1,19 +1,114 @@
 """Модуль для выполнения стартовых скриптов."""
 
+import hashlib
 import os
+import time
+from collections import OrderedDict
+
+from parser import CommandParser
+
+
+class CompiledScript:
+    """Скрипт, заранее разобранный в список команд."""
+
+    __slots__ = ('commands',)
+
+    def __init__(self, commands):
+        """
+        Инициализация скрипта.
+
+        Args:
+            commands: Список (номер строки, строка, команда, аргументы)
+        """
+        self.commands = commands
+
+    @classmethod
+    def compile(cls, lines):
+        """
+        Разобрать строки скрипта, пропуская пустые строки и комментарии.
+
+        Args:
+            lines: Итерируемое строк скрипта
+
+        Returns:
+            CompiledScript: Разобранный скрипт
+        """
+        return cls(list(_parse_lines(lines)))
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __iter__(self):
+        return iter(self.commands)
+
+
+def _parse_lines(lines):
+    """
+    Разобрать строки скрипта по одной.
+
+    Args:
+        lines: Итерируемое строк скрипта
+
+    Yields:
+        tuple: (номер строки, строка, команда, аргументы) для непустых строк без комментариев
+    """
+    for line_num, line in enumerate(lines, 1):
+        # Убираем пробелы и символы новой строки
+        line = line.strip()
+
+        # Пропускаем пустые строки и комментарии
+        if not line or line.startswith('#'):
+            continue
+
+        command, args = CommandParser.parse(line)
+        yield line_num, line, command, args
 
 
 class ScriptRunner:
     """Класс для выполнения команд из стартового скрипта."""
 
-    def __init__(self, emulator):
+    # Скрипты больше этого размера не разбираются заранее, а выполняются потоково
+    STREAM_THRESHOLD = 1024 * 1024
+    # Число разобранных скриптов в кэше (ключ - SHA-256 содержимого)
+    CACHE_SIZE = 64
+
+    # Кэш разобранных скриптов, общий для всех эмуляторов процесса
+    _compiled = OrderedDict()
+
+    def __init__(self, emulator, quiet=False):
         """
         Инициализация ScriptRunner.
 
         Args:
             emulator: Экземпляр эмулятора
+            quiet: Не выводить приглашение перед каждой командой, в конце
+                   сообщить число команд в секунду
         """
         self.emulator = emulator
+        self.quiet = quiet
+
+    @classmethod
+    def compile_script(cls, data):
+        """
+        Получить разобранный скрипт из кэша или разобрать его.
+
+        Args:
+            data: Содержимое скрипта (bytes)
+
+        Returns:
+            CompiledScript: Разобранный скрипт
+        """
+        digest = hashlib.sha256(data).digest()
+        script = cls._compiled.get(digest)
+        if script is not None:
+            cls._compiled.move_to_end(digest)
+            return script
+
+        script = CompiledScript.compile(data.decode('utf-8').splitlines())
+        cls._compiled[digest] = script
+        if len(cls._compiled) > cls.CACHE_SIZE:
+            cls._compiled.popitem(last=False)
+        return script
 
     def run_script(self, script_path):
         """
@@ -34,33 +129,57 @@ class ScriptRunner:
         print(f"{'=' * 60}\n")
 
         try:
-            with open(script_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            for line_num, line in enumerate(lines, 1):
-                # Убираем пробелы и символы новой строки
-                line = line.strip()
-
-                # Пропускаем пустые строки и комментарии
-                if not line or line.startswith('#'):
-                    continue
-
-                # Имитируем диалог с пользователем
-                prompt = self.emulator._get_prompt()
-                print(f"{prompt}{line}")
-
-                # Выполняем команду
-                try:
-                    self.emulator._execute_command_silent(line)
-                except Exception as e:
-                    print(f"Ошибка в строке {line_num}: {e}")
-                    # Продолжаем выполнение скрипта несмотря на ошибку
+            if os.path.getsize(script_path) > self.STREAM_THRESHOLD:
+                # Большой скрипт разбирается и выполняется по строке, не целиком в памяти
+                with open(script_path, 'r', encoding='utf-8') as f:
+                    executed, elapsed = self._execute(_parse_lines(f))
+            else:
+                with open(script_path, 'rb') as f:
+                    script = self.compile_script(f.read())
+                executed, elapsed = self._execute(script)
 
             print(f"\n{'=' * 60}")
             print(f"СКРИПТ ЗАВЕРШЕН")
+            if self.quiet:
+                rate = executed / elapsed if elapsed else 0.0
+                print(f"Выполнено команд: {executed} за {elapsed:.3f} с ({rate:.0f} команд/с)")
             print(f"{'=' * 60}\n")
             return True
 
         except Exception as e:
             print(f"Ошибка при чтении файла скрипта: {e}")
             return False
+
+    def _execute(self, commands):
+        """
+        Выполнить разобранные команды.
+
+        Args:
+            commands: Итерируемое (номер строки, строка, команда, аргументы)
+
+        Returns:
+            tuple: (число выполненных команд, время выполнения в секундах)
+        """
+        emulator = self.emulator
+        session = emulator.session
+        prompt_path = prompt = None
+        executed = 0
+        start = time.perf_counter()
+
+        for line_num, line, command, args in commands:
+            if not self.quiet:
+                # Имитируем диалог с пользователем; приглашение меняется только после cd
+                if session.current_path != prompt_path:
+                    prompt_path = session.current_path
+                    prompt = emulator._get_prompt()
+                print(f"{prompt}{line}")
+
+            # Выполняем команду
+            try:
+                emulator._execute_parsed_silent(command, args)
+            except Exception as e:
+                print(f"Ошибка в строке {line_num}: {e}")
+                # Продолжаем выполнение скрипта несмотря на ошибку
+            executed += 1
+
+        return executed, time.perf_counter() - start
@@ -0,0 +1,346 @@
+"""Модуль сервера командной оболочки.
+
+Сервер на asyncio принимает соединения по TCP или Unix-сокету. Каждое
+соединение получает собственный сеанс (Session) над одной общей VFS и
+собственные экземпляры команд из реестра commands. Протокол строчный:
+клиент отправляет команду, сервер отвечает ее выводом и приглашением.
+
+Обратное давление: следующая команда соединения читается только после
+того, как ответ на предыдущую ушел из буфера записи (writer.drain), а длина
+строки ограничена размером буфера чтения. Медленный клиент тормозит только
+свое соединение и не копит вывод в памяти сервера.
+
+Команды выполняются в пуле потоков (VFS защищена блокировкой чтения/записи):
+вывод забирается пачками, поэтому долгий tree в одном сеансе не
+останавливает цикл событий и остальные соединения.
+"""
+
+import asyncio
+import socket
+import time
+
+from commands import create_commands
+from parser import CommandParser
+
+
+class Connection:
+    """Соединение с сервером: сеанс и команды (для команд играет роль эмулятора)."""
+
+    def __init__(self, vfs, hostname, username=None):
+        """
+        Инициализация соединения.
+
+        Args:
+            vfs: Общая VFS
+            hostname: Имя хоста для приглашения
+            username: Имя пользователя сеанса (None - пользователь VFS)
+        """
+        self.vfs = vfs
+        self.hostname = hostname
+        self.session = vfs.open_session(username)
+        self.running = True
+        self.commands = create_commands(self)
+
+    def prompt(self):
+        """Получить строку приглашения сеанса."""
+        return self.session.prompt(self.hostname)
+
+    def stream(self, command_line):
+        """
+        Выполнить команду в сеансе соединения, выдавая вывод по частям.
+
+        Args:
+            command_line: Строка с командой
+
+        Yields:
+            str: Часть вывода команды (см. Command.stream)
+        """
+        command, args = CommandParser.parse(command_line)
+        if command is None:
+            return
+        self.session.history.append(command_line.strip())
+
+        if command not in self.commands:
+            yield f"{command}: команда не найдена"
+            return
+        try:
+            yield from self.commands[command].stream(args)
+        except Exception as e:
+            yield f"Ошибка выполнения команды: {e}"
+
+    def execute(self, command_line):
+        """
+        Выполнить команду в сеансе соединения.
+
+        Args:
+            command_line: Строка с командой
+
+        Returns:
+            str: Вывод команды (пустая строка, если вывода нет)
+        """
+        return '\n'.join(self.stream(command_line))
+
+
+class ServerStats:
+    """Счетчики сервера: соединения, команды, трафик и задержка ответа."""
+
+    def __init__(self):
+        """Инициализация нулевых счетчиков."""
+        self.started = time.perf_counter()
+        self.connections = 0
+        self.active = 0
+        self.commands = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        # Время от получения команды до передачи ответа в сокет (секунды)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record_command(self, size_in, size_out, latency):
+        """
+        Учесть выполненную команду.
+
+        Args:
+            size_in: Размер команды в байтах
+            size_out: Размер ответа в байтах
+            latency: Задержка ответа в секундах
+        """
+        self.commands += 1
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    def as_dict(self):
+        """
+        Получить счетчики и производные показатели.
+
+        Returns:
+            dict: Счетчики, команд в секунду, средняя и максимальная задержка (секунды)
+        """
+        elapsed = time.perf_counter() - self.started
+        return {
+            'connections': self.connections,
+            'active': self.active,
+            'commands': self.commands,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'commands_per_second': self.commands / elapsed if elapsed else 0.0,
+            'latency_avg': self.latency_total / self.commands if self.commands else 0.0,
+            'latency_max': self.latency_max,
+        }
+
+
+class ShellServer:
+    """Сервер командной оболочки: много сеансов над одной VFS."""
+
+    # Максимальная длина строки команды (буфер чтения соединения)
+    MAX_LINE = 64 * 1024
+    # Порог буфера записи, после которого drain ждет клиента
+    WRITE_BUFFER_HIGH = 64 * 1024
+    # Объем вывода, который команда выдает за один заход в пул потоков
+    BATCH_BYTES = 64 * 1024
+    # Период вывода статистики в отладочном режиме (секунды)
+    REPORT_INTERVAL = 10.0
+
+    def __init__(self, vfs, hostname=None, debug=False):
+        """
+        Инициализация сервера.
+
+        Args:
+            vfs: Общая VFS для всех соединений
+            hostname: Имя хоста в приглашении (None - имя этой машины)
+            debug: Периодически выводить статистику
+        """
+        self.vfs = vfs
+        self.hostname = hostname or socket.gethostname()
+        self.debug = debug
+        self.stats = ServerStats()
+
+    @staticmethod
+    def parse_address(address):
+        """
+        Разобрать адрес сервера.
+
+        Args:
+            address: "unix:/путь/к/сокету", "хост:порт" или "порт"
+
+        Returns:
+            tuple: ('unix', путь) или ('tcp', (хост, порт))
+
+        Raises:
+            ValueError: Если адрес некорректен
+        """
+        if address.startswith('unix:'):
+            return 'unix', address[len('unix:'):]
+        host, _, port = address.rpartition(':')
+        if not port.isdigit():
+            raise ValueError(f"Некорректный адрес сервера: '{address}'")
+        return 'tcp', (host or '127.0.0.1', int(port))
+
+    async def start(self, address):
+        """
+        Начать прием соединений.
+
+        Args:
+            address: Адрес (см. parse_address)
+
+        Returns:
+            asyncio.AbstractServer: Запущенный сервер
+        """
+        kind, target = self.parse_address(address)
+        if kind == 'unix':
+            return await asyncio.start_unix_server(self._handle, path=target, limit=self.MAX_LINE)
+        host, port = target
+        return await asyncio.start_server(self._handle, host, port, limit=self.MAX_LINE)
+
+    async def serve_forever(self, address):
+        """
+        Обслуживать соединения до отмены.
+
+        Args:
+            address: Адрес (см. parse_address)
+        """
+        server = await self.start(address)
+        names = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Сервер командной оболочки слушает {names}")
+        reporter = asyncio.ensure_future(self._report_periodically()) if self.debug else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+
+    async def _report_periodically(self):
+        """Периодически выводить статистику сервера."""
+        while True:
+            await asyncio.sleep(self.REPORT_INTERVAL)
+            print(self.report())
+
+    async def _handle(self, reader, writer):
+        """
+        Обслужить одно соединение.
+
+        Args:
+            reader: asyncio.StreamReader соединения
+            writer: asyncio.StreamWriter соединения
+        """
+        stats = self.stats
+        stats.connections += 1
+        stats.active += 1
+        writer.transport.set_write_buffer_limits(high=self.WRITE_BUFFER_HIGH)
+        connection = Connection(self.vfs, self.hostname)
+        loop = asyncio.get_running_loop()
+
+        try:
+            writer.write(f"Эмулятор командной оболочки UNIX\n{connection.prompt()}".encode('utf-8'))
+            await writer.drain()
+
+            while connection.running:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Строка длиннее буфера чтения
+                    writer.write(f"Ошибка: строка длиннее {self.MAX_LINE} байт\n".encode('utf-8'))
+                    break
+                if not line:
+                    break
+
+                start = time.perf_counter()
+                command_line = line.decode('utf-8', 'replace')
+                command, _ = CommandParser.parse(command_line)
+                sent = 0
+                chunks = connection.stream(command_line)
+                while True:
+                    data = await loop.run_in_executor(None, self._next_batch, chunks)
+                    if not data:
+                        break
+                    # Длинная строка вывода уходит частями, а не одной записью
+                    for offset in range(0, len(data), self.WRITE_BUFFER_HIGH):
+                        writer.write(data[offset:offset + self.WRITE_BUFFER_HIGH])
+                        # Большой вывод не копится в буфере: ждем клиента при его переполнении
+                        if writer.transport.get_write_buffer_size() > self.WRITE_BUFFER_HIGH:
+                            await writer.drain()
+                    sent += len(data)
+                if connection.running:
+                    data = connection.prompt().encode('utf-8')
+                    writer.write(data)
+                    sent += len(data)
+                # Не читаем следующую команду, пока клиент не принял ответ
+                await writer.drain()
+                # Пустая строка - не команда: в статистику не попадает
+                if command is not None:
+                    stats.record_command(len(line), sent, time.perf_counter() - start)
+
+        except ConnectionError:
+            pass
+        finally:
+            stats.active -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _next_batch(self, chunks):
+        """
+        Получить следующую пачку вывода команды (выполняется в пуле потоков).
+
+        Args:
+            chunks: Генератор вывода (см. Connection.stream)
+
+        Returns:
+            bytes: Строки вывода общим объемом около BATCH_BYTES (пусто - вывод закончился)
+        """
+        batch = []
+        size = 0
+        for chunk in chunks:
+            data = (chunk + "\n").encode('utf-8')
+            batch.append(data)
+            size += len(data)
+            if size >= self.BATCH_BYTES:
+                break
+        return b''.join(batch)
+
+    def get_stats(self):
+        """
+        Получить статистику сервера.
+
+        Returns:
+            dict: См. ServerStats.as_dict
+        """
+        return self.stats.as_dict()
+
+    def report(self):
+        """
+        Сформировать строку отчета о работе сервера.
+
+        Returns:
+            str: Отчет
+        """
+        stats = self.get_stats()
+        return (f"Сервер: соединений {stats['connections']} (активных {stats['active']}), "
+                f"команд {stats['commands']} ({stats['commands_per_second']:.1f}/с), "
+                f"задержка {stats['latency_avg'] * 1e3:.3f} мс в среднем, "
+                f"{stats['latency_max'] * 1e3:.3f} мс максимум, "
+                f"принято {stats['bytes_in']} байт, отправлено {stats['bytes_out']} байт")
+
+
+def run(vfs, address, debug=False):
+    """
+    Запустить сервер и обслуживать соединения до Ctrl+C.
+
+    Args:
+        vfs: Общая VFS
+        address: Адрес (см. ShellServer.parse_address)
+        debug: Периодически выводить статистику
+    """
+    server = ShellServer(vfs, debug=debug)
+    try:
+        asyncio.run(server.serve_forever(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.report())
@@ -1,12 +1,138 @@
 """Модуль виртуальной файловой системы."""
 
+import bisect
+import copy
+import functools
+import hashlib
+import itertools
 import os
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
+from blob_store import STORE
+from rwlock import RWLock
+from vfs_journal import node_record
+
+
+# Таблицы для быстрого преобразования прав доступа (индекс - режим 0..0o777)
+_PERM_TRIPLETS = ('---', '--x', '-w-', '-wx', 'r--', 'r-x', 'rw-', 'rwx')
+_PERM_OCTAL = tuple(f"{mode:03o}" for mode in range(0o1000))
+_PERM_STRINGS = tuple(
+    _PERM_TRIPLETS[mode >> 6] + _PERM_TRIPLETS[(mode >> 3) & 7] + _PERM_TRIPLETS[mode & 7]
+    for mode in range(0o1000)
+)
+_MODE_BY_STRING = {octal: mode for mode, octal in enumerate(_PERM_OCTAL)}
+
+_NEWLINE = re.compile(b'\n')
+
+# Размер блока при просмотре содержимого файла с конца (tail)
+_TAIL_CHUNK_SIZE = 64 * 1024
+
+# Флаги изменений узла с момента последнего сохранения
+DIRTY_SELF = 1  # изменились метаданные/содержимое узла или состав директории
+DIRTY_TREE = 2  # изменился кто-то из потомков
+DIRTY_NEW = 4   # узел добавлен целиком (сохраняется все поддерево)
+
+# Счетчик поколений VFS для копирования при записи (0 - поколение новых VFS)
+_generations = itertools.count(1)
+
+# Загрузка отложенных директорий (общая для всех VFS: читатели разных потоков
+# могут одновременно обратиться к одной незагруженной директории)
+_materialize_lock = threading.Lock()
+
+# Последняя выданная метка времени: узлы, созданные в одну секунду,
+# разделяют один объект int вместо собственного datetime
+_last_timestamp = 0
+
+
+def _timestamp():
+    """Получить текущее время в секундах от эпохи (общий объект в пределах секунды)."""
+    global _last_timestamp
+    now = int(time.time())
+    if now != _last_timestamp:
+        _last_timestamp = now
+    return _last_timestamp
+
+
+def _reader(method):
+    """Выполнять метод VFS под блокировкой чтения."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._lock.release_read()
+    return wrapper
+
+
+def _writer(method):
+    """Выполнять метод VFS под блокировкой записи."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._lock.release_write()
+    return wrapper
+
+
+def _normalize(path, cwd):
+    """
+    Нормализовать путь относительно директории (убрать .., ., повторяющиеся /).
+
+    Args:
+        path: Путь для нормализации
+        cwd: Абсолютный путь текущей директории
+
+    Returns:
+        str: Нормализованный абсолютный путь
+    """
+    # Если путь относительный, делаем его абсолютным
+    if not path.startswith('/'):
+        if cwd == '/':
+            path = '/' + path
+        else:
+            path = cwd + '/' + path
+
+    # Разделяем на компоненты
+    parts = []
+    for part in path.split('/'):
+        if part == '' or part == '.':
+            continue
+        elif part == '..':
+            if parts:
+                parts.pop()
+        else:
+            parts.append(part)
+
+    # Собираем обратно
+    if not parts:
+        return '/'
+    return '/' + '/'.join(parts)
+
+
+def _strip_newline(line):
+    """Убрать завершающий перевод строки (\\n, \\r\\n) из строки."""
+    if line.endswith('\n'):
+        line = line[:-1]
+    if line.endswith('\r'):
+        line = line[:-1]
+    return line
+
 
 class VFSNode:
     """Базовый класс для узлов файловой системы."""
 
+    __slots__ = ('name', '_mode', '_owner', '_group', '_mtime', '_parent', '_dirty', '_epoch')
+
     def __init__(self, name, permissions="755", owner="root", group="root"):
         """
         Инициализация узла.
@@ -18,10 +144,14 @@ class VFSNode:
             group: Группа
         """
         self.name = name
-        self._permissions = self._validate_permissions(permissions)
-        self.owner = owner
-        self.group = group
-        self.modified_time = datetime.now()
+        self._parent = None
+        self._dirty = 0
+        # Поколение VFS, которому принадлежит узел (см. VFS.snapshot)
+        self._epoch = 0
+        self._mode = self._parse_mode(permissions)
+        self._owner = sys.intern(owner)
+        self._group = sys.intern(group)
+        self._mtime = _timestamp()
 
     @staticmethod
     def _validate_permissions(permissions):
@@ -49,15 +179,140 @@ class VFSNode:
 
         return permissions
 
+    @staticmethod
+    def _parse_mode(permissions):
+        """
+        Преобразовать права доступа в числовой режим.
+
+        Args:
+            permissions: Строка прав доступа (например, "755")
+
+        Returns:
+            int: Режим в виде числа (например, 0o755)
+
+        Raises:
+            ValueError: Если формат прав некорректен
+        """
+        mode = _MODE_BY_STRING.get(permissions)
+        if mode is None:
+            # Медленный путь: полная валидация с понятным сообщением об ошибке
+            mode = int(VFSNode._validate_permissions(permissions), 8)
+        return mode
+
     @property
     def permissions(self):
         """Получить права доступа."""
-        return self._permissions
+        return _PERM_OCTAL[self._mode]
 
     @permissions.setter
     def permissions(self, value):
         """Установить права доступа с валидацией."""
-        self._permissions = self._validate_permissions(value)
+        self._mode = self._parse_mode(value)
+        self._mark_dirty()
+
+    @property
+    def mode(self):
+        """Получить права доступа в виде числа (например, 0o755)."""
+        return self._mode
+
+    @property
+    def owner(self):
+        """Получить владельца."""
+        return self._owner
+
+    @owner.setter
+    def owner(self, value):
+        """Установить владельца."""
+        self._owner = sys.intern(value)
+        self._mark_dirty()
+
+    @property
+    def group(self):
+        """Получить группу."""
+        return self._group
+
+    @group.setter
+    def group(self, value):
+        """Установить группу."""
+        self._group = sys.intern(value)
+        self._mark_dirty()
+
+    @property
+    def modified_time(self):
+        """Получить время последнего изменения."""
+        return datetime.fromtimestamp(self._mtime)
+
+    @modified_time.setter
+    def modified_time(self, value):
+        """Установить время последнего изменения (datetime или секунды от эпохи)."""
+        if isinstance(value, datetime):
+            value = value.timestamp()
+        self._mtime = int(value)
+
+    @property
+    def mtime(self):
+        """Получить время последнего изменения в секундах от эпохи."""
+        return self._mtime
+
+    @property
+    def parent(self):
+        """
+        Получить родительскую директорию (None для корня и отсоединенных узлов).
+
+        У узлов, разделяемых со снимком, родитель может быть директорией снимка.
+        """
+        return self._parent
+
+    def _mark_dirty(self, flags=DIRTY_SELF):
+        """
+        Отметить узел измененным с момента последнего сохранения.
+
+        Предки получают флаг DIRTY_TREE, поэтому при сохранении изменений
+        обходятся только ветки, в которых что-то менялось.
+
+        Args:
+            flags: Флаги изменения узла (DIRTY_SELF, DIRTY_NEW)
+        """
+        self._dirty |= flags
+        node = self._parent
+        while node is not None and not node._dirty & DIRTY_TREE:
+            node._dirty |= DIRTY_TREE
+            node = node._parent
+        self._invalidate_merkle()
+
+    def _invalidate_merkle(self):
+        """Сбросить кэшированные хэши Меркла директорий, содержащих узел."""
+        if self._parent is not None:
+            self._parent._invalidate_merkle()
+
+    def _meta_bytes(self):
+        """Метаданные узла, входящие в хэш Меркла (время изменения не входит)."""
+        return f"{self._mode:o}\0{self._owner}\0{self._group}\0".encode('utf-8')
+
+    def is_dirty(self):
+        """Проверить, изменялся ли узел или его поддерево с момента сохранения."""
+        return bool(self._dirty)
+
+    def _clone(self, epoch):
+        """
+        Создать копию узла для копирования при записи (без родителя).
+
+        Args:
+            epoch: Поколение VFS, которому будет принадлежать копия
+
+        Returns:
+            VFSNode: Копия узла
+        """
+        clone = object.__new__(type(self))
+        clone.name = self.name
+        clone._mode = self._mode
+        clone._owner = self._owner
+        clone._group = self._group
+        clone._mtime = self._mtime
+        clone._parent = None
+        clone._dirty = self._dirty
+        clone._epoch = epoch
+        return clone
 
     def is_directory(self):
         """Проверить, является ли узел директорией."""
@@ -67,31 +322,25 @@ class VFSNode:
         """Проверить, является ли узел файлом."""
         return False
 
+    def is_executable(self):
+        """Проверить, установлен ли бит выполнения у любой группы (user/group/other)."""
+        return bool(self._mode & 0o111)
+
     def get_permissions_string(self):
         """Получить строковое представление прав доступа (например, rwxr-xr-x)."""
-        perm_map = {
-            '0': '---',
-            '1': '--x',
-            '2': '-w-',
-            '3': '-wx',
-            '4': 'r--',
-            '5': 'r-x',
-            '6': 'rw-',
-            '7': 'rwx'
-        }
+        return _PERM_STRINGS[self._mode]
 
-        if len(self.permissions) != 3:
-            return '---------'
 
-        result = ''
-        for digit in self.permissions:
-            result += perm_map.get(digit, '---')
-
-        return result
+class File(VFSNode):
+    """Класс для представления файла.
 
+    Содержимое хранится в байтах (bytes или memoryview); декодированный текст
+    и индекс начал строк вычисляются лениво при первом обращении.
+    Содержимое bytes разделяется через хранилище blob_store.STORE:
+    файлы с одинаковым содержимым ссылаются на один объект.
+    """
 
-class File(VFSNode):
-    """Класс для представления файла."""
+    __slots__ = ('_data', '_text', '_line_offsets', '_digest', '_view_digest')
 
     def __init__(self, name, content="", permissions="644", owner="root", group="root"):
         """
@@ -99,38 +348,257 @@ class File(VFSNode):
 
         Args:
             name: Имя файла
-            content: Содержимое файла
+            content: Содержимое файла (str, bytes или memoryview)
             permissions: Права доступа
             owner: Владелец
             group: Группа
         """
+        # Хэш содержимого в хранилище (None для содержимого вне хранилища)
+        self._digest = None
+        # Хэш содержимого вне хранилища (срез образа): вычисляется один раз
+        self._view_digest = None
         super().__init__(name, permissions, owner, group)
-        self.content = content
+        self._set_data(content)
+
+    def __del__(self):
+        # Узел освобожден - отпускаем ссылку на блок содержимого
+        if self._digest is not None:
+            STORE.release(self._digest)
+
+    def __copy__(self):
+        clone = File.__new__(type(self))
+        clone._digest = None
+        for slot in VFSNode.__slots__ + File.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        # Копия ссылается на тот же блок - берем на него ссылку
+        if clone._digest is not None:
+            STORE.retain(clone._digest)
+        return clone
+
+    def __deepcopy__(self, memo):
+        clone = File.__new__(type(self))
+        clone._digest = None
+        memo[id(self)] = clone
+        for slot in VFSNode.__slots__ + File.__slots__:
+            value = getattr(self, slot)
+            # Содержимое неизменяемо (в том числе memoryview образа) - разделяется
+            setattr(clone, slot, value if slot == '_data' else copy.deepcopy(value, memo))
+        if clone._digest is not None:
+            STORE.retain(clone._digest)
+        return clone
+
+    def _set_data(self, content):
+        """
+        Заменить содержимое файла и сбросить производные кэши.
+
+        Args:
+            content: Новое содержимое (str, bytes или memoryview)
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        old_digest = self._digest
+        if isinstance(content, (bytes, bytearray)):
+            self._digest, content = STORE.acquire(bytes(content))
+        else:
+            # Срез отображенного в память образа - уже разделяется страничным кэшем
+            self._digest = None
+        if old_digest is not None:
+            STORE.release(old_digest)
+        self._view_digest = None
+        if self._parent is not None:
+            self._parent._apply_delta(0, 0, len(content) - len(self._data))
+            self._parent._invalidate_merkle()
+        self._data = content
+        self._text = None
+        self._line_offsets = None
 
     def is_file(self):
         return True
 
+    def _clone(self, epoch):
+        clone = super()._clone(epoch)
+        # Содержимое неизменяемо (write заменяет его целиком) - разделяется копиями
+        clone._data = self._data
+        clone._text = self._text
+        clone._line_offsets = self._line_offsets
+        clone._digest = self._digest
+        clone._view_digest = self._view_digest
+        if self._digest is not None:
+            STORE.retain(self._digest)
+        return clone
+
+    def merkle_hash(self):
+        """
+        Получить хэш файла: метаданные и SHA-256 содержимого.
+
+        Returns:
+            bytes: SHA-256
+        """
+        return hashlib.sha256(b'F' + self._meta_bytes() + self.content_digest()).digest()
+
+    @property
+    def content(self):
+        """Содержимое файла в виде строки."""
+        return self.read()
+
+    @content.setter
+    def content(self, value):
+        """Заменить содержимое файла без обновления времени изменения."""
+        self._set_data(value)
+        self._mark_dirty()
+
     def get_size(self):
         """Получить размер файла в байтах."""
-        return len(self.content.encode('utf-8'))
+        return len(self._data)
 
     def read(self):
         """Прочитать содержимое файла."""
-        return self.content
+        if self._text is None:
+            self._text = str(self._data, 'utf-8', 'replace')
+        return self._text
+
+    def read_bytes(self):
+        """Прочитать содержимое файла в виде байтов (без копирования)."""
+        return self._data
+
+    def content_digest(self):
+        """
+        Получить SHA-256 содержимого файла.
+
+        Returns:
+            bytes: Хэш из хранилища или вычисленный для содержимого вне его
+        """
+        if self._digest is not None:
+            return self._digest
+        if self._view_digest is None:
+            self._view_digest = STORE.digest(self._data)
+        return self._view_digest
+
+    def line_offsets(self):
+        """
+        Получить индекс строк файла.
+
+        Returns:
+            array: Смещения начала каждой строки в байтах
+        """
+        if self._line_offsets is None:
+            data = self._data
+            size = len(data)
+            offsets = array('Q', [0] if size else [])
+            # re работает с любым буфером (bytes, memoryview) без копирования
+            for match in _NEWLINE.finditer(data):
+                if match.end() < size:
+                    offsets.append(match.end())
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    def line_count(self):
+        """Получить количество строк в файле."""
+        return len(self.line_offsets())
+
+    def read_lines(self, start=0, stop=None):
+        """
+        Прочитать диапазон строк, не декодируя остальное содержимое.
+
+        Args:
+            start: Индекс первой строки (допускаются отрицательные значения)
+            stop: Индекс строки, следующей за последней (None - до конца)
+
+        Returns:
+            list: Строки без символов перевода строки
+        """
+        offsets = self.line_offsets()
+        start, stop, _ = slice(start, stop).indices(len(offsets))
+        lines = []
+        for i in range(start, stop):
+            end = offsets[i + 1] if i + 1 < len(offsets) else len(self._data)
+            lines.append(_strip_newline(str(self._data[offsets[i]:end], 'utf-8', 'replace')))
+        return lines
+
+    def tail_lines(self, count):
+        """
+        Прочитать последние строки файла, просматривая содержимое с конца.
+
+        Стоимость пропорциональна размеру возвращаемых строк, а не файла.
+
+        Args:
+            count: Количество строк
+
+        Returns:
+            list: Последние строки без символов перевода строки
+        """
+        if count <= 0:
+            return []
+        if self._line_offsets is not None:
+            return self.read_lines(-count)
+
+        data = self._data
+        size = len(data)
+        # Перевод строки в самом конце не начинает новую строку
+        pos = size - 1 if size and data[size - 1] == 0x0a else size
+        start = 0
+        found = 0
+        while pos > 0 and not start:
+            chunk_start = max(0, pos - _TAIL_CHUNK_SIZE)
+            chunk = bytes(data[chunk_start:pos])
+            index = len(chunk)
+            while True:
+                index = chunk.rfind(b'\n', 0, index)
+                if index < 0:
+                    break
+                found += 1
+                if found == count:
+                    start = chunk_start + index + 1
+                    break
+            pos = chunk_start
+
+        text = str(data[start:size], 'utf-8', 'replace')
+        if text.endswith('\n'):
+            text = text[:-1]
+        if not text and size == start:
+            return []
+        return [_strip_newline(line) for line in text.split('\n')]
+
+    def tail_bytes(self, count):
+        """
+        Прочитать последние байты файла.
+
+        Args:
+            count: Количество байт
+
+        Returns:
+            str: Последние байты, декодированные как UTF-8
+        """
+        if count <= 0:
+            return ""
+        return str(self._data[-count:], 'utf-8', 'replace')
 
     def write(self, content):
         """
         Записать содержимое в файл.
 
         Args:
-            content: Новое содержимое
+            content: Новое содержимое (str, bytes или memoryview)
         """
-        self.content = content
-        self.modified_time = datetime.now()
+        self._set_data(content)
+        self._mtime = _timestamp()
+        self._mark_dirty()
 
 
 class Directory(VFSNode):
-    """Класс для представления директории."""
+    """Класс для представления директории.
+
+    Директория поддерживает агрегаты по своему поддереву (число директорий
+    и файлов, суммарный размер, глубина), которые обновляются при
+    add_child/remove_child и записи в файлы, поэтому их чтение стоит O(1).
+    Имена потомков хранятся также в отсортированном списке, поэтому вывод
+    содержимого не требует сортировки, а поиск по префиксу - логарифмический.
+    Хэш Меркла поддерева вычисляется лениво и сбрасывается у директории
+    и ее предков при любом изменении поддерева.
+    """
+
+    __slots__ = ('_children', '_names', '_visible_names', '_pending',
+                 '_dir_count', '_file_count', '_total_bytes', '_max_depth', '_merkle')
 
     def __init__(self, name, permissions="755", owner="root", group="root"):
         """
@@ -143,11 +611,156 @@ class Directory(VFSNode):
             group: Группа
         """
         super().__init__(name, permissions, owner, group)
-        self.children = {}
+        self._children = {}
+        self._names = []
+        self._visible_names = None
+        # Отложенная загрузка потомков: (загрузчик, индекс в образе) или None
+        self._pending = None
+        self._dir_count = 0
+        self._file_count = 0
+        self._total_bytes = 0
+        self._max_depth = 0
+        # Хэш Меркла поддерева (None - не вычислен или сброшен изменением)
+        self._merkle = None
 
     def is_directory(self):
         return True
 
+    def _clone(self, epoch):
+        clone = super()._clone(epoch)
+        # Копируются только таблицы потомков, сами потомки разделяются
+        clone._children = dict(self.children)
+        clone._names = list(self._names)
+        clone._visible_names = self._visible_names
+        clone._pending = None
+        clone._dir_count = self._dir_count
+        clone._file_count = self._file_count
+        clone._total_bytes = self._total_bytes
+        clone._max_depth = self._max_depth
+        clone._merkle = self._merkle
+        return clone
+
+    def _replace_child(self, node):
+        """
+        Подменить потомка его копией с тем же именем (агрегаты не меняются).
+
+        Args:
+            node: Копия существующего потомка
+        """
+        self._children[node.name] = node
+        node._parent = self
+
+    @property
+    def children(self):
+        """Словарь имя -> дочерний узел (при отложенной загрузке материализуется)."""
+        if self._pending is not None:
+            self._materialize()
+        return self._children
+
+    def is_materialized(self):
+        """Проверить, загружены ли потомки директории."""
+        return self._pending is None
+
+    def _materialize(self):
+        """Загрузить потомков из источника образа при первом обращении."""
+        with _materialize_lock:
+            if self._pending is None:
+                # Директорию уже загрузил другой поток
+                return
+            loader, index = self._pending
+            loader.materialize(self, index)
+            # Сбрасывается последним: другие потоки читают потомков без блокировки
+            self._pending = None
+
+    def _invalidate_merkle(self):
+        # Если хэш директории не вычислен, то не вычислены и хэши ее предков
+        node = self
+        while node is not None and node._merkle is not None:
+            node._merkle = None
+            node = node._parent
+
+    def merkle_hash(self):
+        """
+        Получить хэш Меркла поддерева: метаданные директории, имена потомков
+        и их хэши. Пересчитываются только директории, измененные с прошлого вызова.
+
+        Returns:
+            bytes: SHA-256
+        """
+        if self._merkle is None:
+            children = self.children
+            digest = hashlib.sha256(b'D' + self._meta_bytes())
+            for name in self._names:
+                digest.update(name.encode('utf-8') + b'\0')
+                digest.update(children[name].merkle_hash())
+            self._merkle = digest.digest()
+        return self._merkle
+
+    @property
+    def dir_count(self):
+        """Количество директорий в поддереве (без самой директории)."""
+        return self._dir_count
+
+    @property
+    def file_count(self):
+        """Количество файлов в поддереве."""
+        return self._file_count
+
+    @property
+    def total_bytes(self):
+        """Суммарный размер файлов поддерева в байтах."""
+        return self._total_bytes
+
+    @property
+    def max_depth(self):
+        """Глубина поддерева (0 - пустая директория, 1 - только непосредственные потомки)."""
+        return self._max_depth
+
+    @staticmethod
+    def _subtree_totals(node):
+        """
+        Получить вклад узла в агрегаты родителя.
+
+        Args:
+            node: Узел (File или Directory)
+
+        Returns:
+            tuple: (директорий, файлов, байт)
+        """
+        if node.is_directory():
+            return node._dir_count + 1, node._file_count, node._total_bytes
+        return 0, 1, node.get_size()
+
+    def _apply_delta(self, dirs, files, size):
+        """
+        Изменить агрегаты директории и всех ее предков.
+
+        Args:
+            dirs: Изменение числа директорий
+            files: Изменение числа файлов
+            size: Изменение суммарного размера
+        """
+        node = self
+        while node is not None:
+            node._dir_count += dirs
+            node._file_count += files
+            node._total_bytes += size
+            node = node._parent
+
+    def _refresh_depth(self):
+        """Пересчитать глубину директории и предков после удаления потомка."""
+        node = self
+        while node is not None:
+            depth = 0
+            for child in node.children.values():
+                child_depth = child._max_depth + 1 if child.is_directory() else 1
+                if child_depth > depth:
+                    depth = child_depth
+            if depth == node._max_depth:
+                break
+            node._max_depth = depth
+            node = node._parent
+
     def add_child(self, node):
         """
         Добавить дочерний узел.
@@ -155,7 +768,41 @@ class Directory(VFSNode):
         Args:
             node: Узел (File или Directory)
         """
-        self.children[node.name] = node
+        if node.name in self.children:
+            self.remove_child(node.name)
+        self._children[node.name] = node
+        bisect.insort(self._names, node.name)
+        self._visible_names = None
+        node._parent = self
+        self._apply_delta(*self._subtree_totals(node))
+        self._mark_dirty(DIRTY_SELF | DIRTY_TREE)
+        node._dirty |= DIRTY_NEW
+
+        # Глубина при добавлении может только вырасти
+        depth = node._max_depth + 1 if node.is_directory() else 1
+        current = self
+        while current is not None and depth > current._max_depth:
+            current._max_depth = depth
+            depth += 1
+            current = current._parent
+
+    def _restore_children(self, nodes, totals):
+        """
+        Заполнить пустую директорию готовыми потомками (для загрузчиков образов).
+
+        Агрегаты не пересчитываются и не распространяются к предкам:
+        они берутся из образа, где уже посчитаны для всего поддерева.
+
+        Args:
+            nodes: Дочерние узлы, отсортированные по имени
+            totals: (директорий, файлов, байт, глубина) поддерева
+        """
+        for node in nodes:
+            node._parent = self
+            self._children[node.name] = node
+        self._names = [node.name for node in nodes]
+        self._visible_names = None
+        self._dir_count, self._file_count, self._total_bytes, self._max_depth = totals
 
     def get_child(self, name):
         """
@@ -179,10 +826,17 @@ class Directory(VFSNode):
         Returns:
             bool: True если удален, False если не найден
         """
-        if name in self.children:
-            del self.children[name]
-            return True
-        return False
+        node = self.children.pop(name, None)
+        if node is None:
+            return False
+        del self._names[bisect.bisect_left(self._names, name)]
+        self._visible_names = None
+        node._parent = None
+        dirs, files, size = self._subtree_totals(node)
+        self._apply_delta(-dirs, -files, -size)
+        self._refresh_depth()
+        self._mark_dirty()
+        return True
 
     def list_children(self, show_hidden=False):
         """
@@ -194,26 +848,287 @@ class Directory(VFSNode):
         Returns:
             list: Список имен дочерних узлов
         """
+        if self._pending is not None:
+            self._materialize()
         if show_hidden:
-            return sorted(self.children.keys())
+            return list(self._names)
+        if self._visible_names is None:
+            self._visible_names = [name for name in self._names if not name.startswith('.')]
+        return list(self._visible_names)
+
+    def list_children_with_prefix(self, prefix, show_hidden=True):
+        """
+        Получить отсортированный список имен потомков, начинающихся с префикса.
+
+        Args:
+            prefix: Префикс имени (например, для автодополнения)
+            show_hidden: Показывать ли скрытые файлы (начинающиеся с .)
+
+        Returns:
+            list: Список имен дочерних узлов
+        """
+        if not prefix:
+            return self.list_children(show_hidden)
+        return [name for name in self.list_children_in_range(prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+                if show_hidden or not name.startswith('.')]
+
+    def list_children_in_range(self, low, high):
+        """
+        Получить отсортированный список имен потомков в полуинтервале [low, high).
+
+        Args:
+            low: Нижняя граница (включительно)
+            high: Верхняя граница (не включительно)
+
+        Returns:
+            list: Список имен дочерних узлов
+        """
+        if self._pending is not None:
+            self._materialize()
+        start = bisect.bisect_left(self._names, low)
+        end = bisect.bisect_left(self._names, high, start)
+        return self._names[start:end]
+
+
+class _Transaction:
+    """Открытая транзакция VFS: записи отмены и записи повтора для журнала."""
+
+    __slots__ = ('undo', 'redo')
+
+    def __init__(self):
+        self.undo = []
+        self.redo = []
+
+
+class Snapshot:
+    """Снимок состояния VFS.
+
+    Снимок хранит только ссылку на корень: узлы разделяются с VFS, а VFS
+    после снимка копирует при изменении путь от измененного узла до корня.
+    """
+
+    __slots__ = ('root', 'username', 'current_path', 'created')
+
+    def __init__(self, root, username, current_path):
+        self.root = root
+        self.username = username
+        self.current_path = current_path
+        self.created = _timestamp()
+
+
+class Session:
+    """Сеанс работы с VFS: пользователь, текущая и предыдущая директории, история.
+
+    Сеанс не хранит узлов и кэшей, поэтому одну загруженную VFS могут
+    разделять сотни сеансов. Относительные пути, ~ и - разрешаются
+    в абсолютные внутри сеанса, дерево читается и изменяется через VFS
+    (под ее блокировками).
+    """
+
+    __slots__ = ('vfs', 'username', 'current_path', 'previous_path', 'history')
+
+    def __init__(self, vfs, username=None):
+        """
+        Инициализация сеанса в корневой директории.
+
+        Args:
+            vfs: Разделяемая VFS
+            username: Имя пользователя (None - пользователь VFS)
+        """
+        self.vfs = vfs
+        self.username = username or vfs.username
+        self.current_path = "/"
+        self.previous_path = "/"
+        self.history = []
+
+    @property
+    def home(self):
+        """Домашняя директория пользователя сеанса."""
+        return f'/home/{self.username}'
+
+    def prompt(self, hostname):
+        """
+        Получить строку приглашения командной строки (домашняя директория сокращается до ~).
+
+        Args:
+            hostname: Имя хоста
+
+        Returns:
+            str: Приглашение вида [user@host ~/dir]$
+        """
+        current_dir = self.current_path
+        home = self.home
+        if current_dir == home or current_dir.startswith(home + '/'):
+            display_dir = "~" + current_dir[len(home):]
         else:
-            return sorted([name for name in self.children.keys() if not name.startswith('.')])
+            display_dir = current_dir
+        return f"[{self.username}@{hostname} {display_dir}]$ "
+
+    def resolve_path(self, path):
+        """
+        Преобразовать путь сеанса (с учетом ~, - и текущей директории) в абсолютный.
+
+        Args:
+            path: Путь
+
+        Returns:
+            str: Нормализованный абсолютный путь
+        """
+        if path == '~':
+            path = self.home
+        elif path.startswith('~/'):
+            path = self.home + path[1:]
+        elif path == '-':
+            path = self.previous_path
+        return _normalize(path, self.current_path)
+
+    def get_current_directory(self):
+        """Получить текущую директорию."""
+        return self.current_path
+
+    def change_directory(self, path):
+        """
+        Сменить текущую директорию сеанса.
+
+        Args:
+            path: Путь к новой директории
+
+        Returns:
+            bool: True если успешно, False если ошибка
+        """
+        path = self.resolve_path(path)
+        node = self.vfs.get_node(path)
+        if node is None or not node.is_directory():
+            return False
+        self.previous_path = self.current_path
+        self.current_path = path
+        return True
+
+    def get_node(self, path):
+        """Получить узел по пути сеанса (см. VFS.get_node)."""
+        return self.vfs.get_node(self.resolve_path(path))
+
+    def read_file(self, path):
+        """Прочитать содержимое файла (см. VFS.read_file)."""
+        return self.vfs.read_file(self.resolve_path(path))
+
+    def list_directory(self, path, show_hidden=False):
+        """Получить список имен потомков директории (см. VFS.list_directory)."""
+        return self.vfs.list_directory(self.resolve_path(path), show_hidden)
+
+    def create_file(self, path, content="", permissions="644"):
+        """Создать файл, принадлежащий пользователю сеанса (см. VFS.create_file)."""
+        return self.vfs.create_file(self.resolve_path(path), content, permissions, self.username)
+
+    def create_directory(self, path, permissions="755"):
+        """Создать директорию, принадлежащую пользователю сеанса (см. VFS.create_directory)."""
+        return self.vfs.create_directory(self.resolve_path(path), permissions, self.username)
+
+    def remove_node(self, path):
+        """Удалить файл или директорию (см. VFS.remove_node)."""
+        return self.vfs.remove_node(self.resolve_path(path))
+
+    def write_file(self, path, content):
+        """Записать содержимое в существующий файл (см. VFS.write_file)."""
+        return self.vfs.write_file(self.resolve_path(path), content)
+
+    def chmod(self, path, permissions):
+        """Изменить права доступа узла (см. VFS.chmod)."""
+        return self.vfs.chmod(self.resolve_path(path), permissions)
 
 
 class VFS:
-    """Виртуальная файловая система."""
+    """Виртуальная файловая система.
+
+    Методы VFS потокобезопасны: чтение (get_node, read_file, list_directory,
+    diff) выполняется параллельно под блокировкой чтения, изменения
+    (create_*, remove_node, write_file, chmod и др.) - под блокировкой записи.
+    Транзакция удерживает блокировку записи от begin до commit/rollback.
+    Узлы, полученные через get_node, при обращении из нескольких потоков
+    нужно читать под vfs.read_lock().
+    """
+
+    # Размер LRU-кэша путей по умолчанию
+    PATH_CACHE_SIZE = 1024
 
-    def __init__(self, username="user"):
+    def __init__(self, username="user", cache_size=PATH_CACHE_SIZE, path_index=False):
         """
         Инициализация VFS.
 
         Args:
             username: Имя пользователя для домашней директории
+            cache_size: Максимальное число путей в кэше get_node (0 - без кэша)
+            path_index: Вести ли индекс абсолютных путей (см. enable_path_index)
         """
         self.username = username
         self.root = Directory("/", "755", "root", "root")
-        self.current_path = "/"
-        self.previous_path = "/"
+        # Сеанс по умолчанию: к нему относятся относительные пути методов VFS
+        self.session = Session(self, username)
+
+        # Кэш нормализованный путь -> узел (LRU) и кэш нормализации исходных путей
+        self.cache_size = cache_size
+        self._node_cache = OrderedDict()
+        # Директория -> закэшированные пути непосредственно под ней (для сброса по префиксу)
+        self._cache_children = {}
+        self._normalize_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Индекс путей (таблица inode): путь -> узел и узел -> путь
+        # (префиксный поиск идет по отсортированным именам директорий)
+        self._path_index = None
+        self._node_paths = None
+
+        # Транзакции и журнал упреждающей записи
+        self._transaction = None
+        self._wal = None
+
+        # Поколение узлов, которые можно изменять на месте (см. snapshot)
+        self._generation = 0
+
+        # Блокировка чтения/записи дерева и мьютекс LRU-кэша путей,
+        # который get_node изменяет и под блокировкой чтения
+        self._lock = RWLock()
+        self._cache_lock = threading.Lock()
+
+        # Индекс строится под блокировкой записи, поэтому после ее создания
+        if path_index:
+            self.enable_path_index()
+
+    @property
+    def current_path(self):
+        """Текущая директория сеанса по умолчанию."""
+        return self.session.current_path
+
+    @current_path.setter
+    def current_path(self, value):
+        self.session.current_path = value
+
+    @property
+    def previous_path(self):
+        """Предыдущая директория сеанса по умолчанию (для cd -)."""
+        return self.session.previous_path
+
+    @previous_path.setter
+    def previous_path(self, value):
+        self.session.previous_path = value
+
+    def open_session(self, username=None):
+        """
+        Открыть новый сеанс работы с этой VFS в домашней директории пользователя.
+
+        Args:
+            username: Имя пользователя сеанса (None - пользователь VFS)
+
+        Returns:
+            Session: Сеанс в /home/<username>, /home/user или в корне
+        """
+        session = Session(self, username)
+        for home in (session.home, '/home/user', '/'):
+            if session.change_directory(home):
+                break
+        session.previous_path = session.current_path
+        return session
 
     def _normalize_path(self, path):
         """
@@ -225,28 +1140,7 @@ class VFS:
         Returns:
             str: Нормализованный путь
         """
-        # Если путь относительный, делаем его абсолютным
-        if not path.startswith('/'):
-            if self.current_path == '/':
-                path = '/' + path
-            else:
-                path = self.current_path + '/' + path
-
-        # Разделяем на компоненты
-        parts = []
-        for part in path.split('/'):
-            if part == '' or part == '.':
-                continue
-            elif part == '..':
-                if parts:
-                    parts.pop()
-            else:
-                parts.append(part)
-
-        # Собираем обратно
-        if not parts:
-            return '/'
-        return '/' + '/'.join(parts)
+        return _normalize(path, self.current_path)
 
     def resolve_path(self, path):
         """
@@ -267,6 +1161,282 @@ class VFS:
         else:
             return path
 
+    @staticmethod
+    def _is_cwd_independent(path):
+        """Проверить, что результат разрешения пути не зависит от текущей директории."""
+        return path.startswith('/') or path == '~' or path.startswith('~/')
+
+    def _resolve_cached(self, path):
+        """
+        Разрешить и нормализовать путь, используя кэш нормализации.
+
+        Args:
+            path: Исходный путь
+
+        Returns:
+            str: Нормализованный абсолютный путь
+        """
+        # Относительный путь кэшируется вместе с текущей директорией: ее можно
+        # сменить в обход change_directory (сеанс, свойство current_path, снимок)
+        key = path if self._is_cwd_independent(path) else (self.current_path, path)
+        normalized = self._normalize_cache.get(key)
+        if normalized is None:
+            normalized = self._normalize_path(self.resolve_path(path))
+            # "-" зависит от предыдущей директории - не кэшируем
+            if self.cache_size and path != '-':
+                if len(self._normalize_cache) >= self.cache_size:
+                    self._normalize_cache.clear()
+                self._normalize_cache[key] = normalized
+        return normalized
+
+    def _invalidate_path(self, path):
+        """
+        Удалить из кэша узел по нормализованному пути и всех его потомков.
+
+        Обходит только закэшированные пути под path, а не весь кэш.
+
+        Args:
+            path: Нормализованный путь
+        """
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            self._node_cache.pop(current, None)
+            stack.extend(self._cache_children.pop(current, ()))
+        self._cache_unlink(path)
+
+    def _cache_link(self, path):
+        """
+        Зарегистрировать закэшированный путь у всех его предков.
+
+        Args:
+            path: Нормализованный путь
+        """
+        while path != '/':
+            parent = path.rsplit('/', 1)[0] or '/'
+            children = self._cache_children.setdefault(parent, set())
+            if path in children:
+                return
+            children.add(path)
+            path = parent
+
+    def _cache_unlink(self, path):
+        """
+        Снять регистрацию пути, под которым больше нет закэшированных узлов.
+
+        Args:
+            path: Нормализованный путь
+        """
+        while (path != '/' and path not in self._node_cache
+               and not self._cache_children.get(path)):
+            self._cache_children.pop(path, None)
+            parent = path.rsplit('/', 1)[0] or '/'
+            self._cache_children.get(parent, set()).discard(path)
+            path = parent
+
+    def get_cache_stats(self):
+        """
+        Получить статистику кэша путей.
+
+        Returns:
+            dict: Попадания, промахи, текущий и максимальный размер кэша
+        """
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._node_cache),
+            'capacity': self.cache_size,
+        }
+
+    def read_lock(self):
+        """Контекстный менеджер блокировки чтения (для нескольких чтений подряд)."""
+        return self._lock.read()
+
+    def write_lock(self):
+        """Контекстный менеджер блокировки записи (для изменения узлов напрямую)."""
+        return self._lock.write()
+
+    def get_lock_stats(self):
+        """
+        Получить статистику блокировки дерева (времена в секундах).
+
+        Returns:
+            dict: {'read': {...}, 'write': {...}} с числом захватов, временем
+                  ожидания, суммарным и максимальным временем удержания
+        """
+        return self._lock.get_stats()
+
+    @_writer
+    def enable_path_index(self):
+        """
+        Построить индекс абсолютных путей и поддерживать его при изменениях.
+
+        После включения get_node для любого пути выполняет один поиск в словаре.
+        Индекс обновляется методами create_file, create_directory и remove_node;
+        изменения через Directory.add_child/remove_child напрямую требуют
+        повторного вызова enable_path_index.
+        """
+        self._path_index = {'/': self.root}
+        self._node_paths = {self.root: '/'}
+        self._index_subtree('/', self.root)
+
+    @_writer
+    def disable_path_index(self):
+        """Отключить индекс путей и освободить занимаемую им память."""
+        self._path_index = None
+        self._node_paths = None
+
+    def has_path_index(self):
+        """Проверить, включен ли индекс путей."""
+        return self._path_index is not None
+
+    def _index_subtree(self, path, directory):
+        """
+        Добавить в индекс всех потомков директории.
+
+        Args:
+            path: Нормализованный путь директории
+            directory: Директория
+        """
+        for child_path, child in self._walk_subtree(path, directory):
+            self._path_index[child_path] = child
+            self._node_paths[child] = child_path
+
+    @staticmethod
+    def _walk_subtree(path, directory):
+        """
+        Обойти всех потомков директории.
+
+        Args:
+            path: Нормализованный путь директории
+            directory: Директория
+
+        Yields:
+            tuple: (абсолютный путь, узел)
+        """
+        stack = [(path, directory)]
+        while stack:
+            dir_path, current = stack.pop()
+            base = '' if dir_path == '/' else dir_path
+            for name, child in current.children.items():
+                child_path = f"{base}/{name}"
+                yield child_path, child
+                if child.is_directory():
+                    stack.append((child_path, child))
+
+    def _index_add(self, path, node):
+        """
+        Добавить узел (и его поддерево) в индекс путей.
+
+        Args:
+            path: Нормализованный путь узла
+            node: Узел
+        """
+        if self._path_index is None:
+            return
+        if path in self._path_index:
+            # Узел заменяется - старое поддерево больше недоступно
+            self._index_remove(path)
+        self._path_index[path] = node
+        self._node_paths[node] = path
+        if node.is_directory():
+            self._index_subtree(path, node)
+
+    def _index_remove(self, path):
+        """
+        Удалить из индекса путь и всех его потомков.
+
+        Args:
+            path: Нормализованный путь узла (не корень)
+        """
+        if self._path_index is None:
+            return
+        node = self._path_index.pop(path, None)
+        if node is None:
+            return
+        self._node_paths.pop(node, None)
+        if node.is_directory():
+            # Поддерево удаленного узла обходится целиком - остальной индекс не затрагивается
+            for stale, child in self._walk_subtree(path, node):
+                self._path_index.pop(stale, None)
+                self._node_paths.pop(child, None)
+
+    @_reader
+    def find_paths(self, prefix):
+        """
+        Найти все пути, начинающиеся с префикса.
+
+        Поиск идет по отсортированным спискам имен директорий: обходятся
+        только поддеревья потомков с подходящим именем в директории префикса,
+        поэтому индекс путей не требуется и не строится.
+
+        Args:
+            prefix: Префикс абсолютного пути (например, "/home/user/")
+
+        Returns:
+            list: Отсортированный список путей
+        """
+        # Директория, в которой лежат пути с префиксом, и префикс имени в ней
+        if prefix and not prefix.startswith('/'):
+            return []
+        dir_path, _, name_prefix = prefix.rpartition('/')
+        directory = self.get_node(dir_path or '/')
+        if directory is None or not directory.is_directory():
+            return []
+
+        paths = ['/'] if prefix in ('', '/') else []
+        base = dir_path if dir_path != '/' else ''
+        for name in directory.list_children_with_prefix(name_prefix):
+            child_path = f"{base}/{name}"
+            child = directory.get_child(name)
+            paths.append(child_path)
+            if child.is_directory():
+                paths.extend(path for path, _ in self._walk_subtree(child_path, child))
+        paths.sort()
+        return paths
+
+    def list_subtree(self, path):
+        """
+        Получить пути всех потомков директории с помощью префиксного поиска.
+
+        Args:
+            path: Путь к директории
+
+        Returns:
+            list: Отсортированный список абсолютных путей потомков
+        """
+        path = self._resolve_cached(path)
+        if path == '/':
+            return [p for p in self.find_paths('/') if p != '/']
+        return self.find_paths(path + '/')
+
+    @_reader
+    def get_path(self, node):
+        """
+        Получить абсолютный путь узла (обратный поиск).
+
+        Без индекса путь собирается по цепочке родителей и проверяется
+        поиском: узел, разделяемый со снимком, может ссылаться на родителя
+        из другого дерева.
+
+        Args:
+            node: Узел VFS
+
+        Returns:
+            str или None: Путь узла или None, если узел не принадлежит VFS
+        """
+        if self._path_index is not None:
+            return self._node_paths.get(node)
+
+        names = []
+        current = node
+        while current._parent is not None:
+            names.append(current.name)
+            current = current._parent
+        path = '/' + '/'.join(reversed(names))
+        return path if self.get_node(path) is node else None
+
+    @_reader
     def get_node(self, path):
         """
         Получить узел по пути.
@@ -277,12 +1447,22 @@ class VFS:
         Returns:
             VFSNode или None
         """
-        path = self.resolve_path(path)
-        path = self._normalize_path(path)
+        path = self._resolve_cached(path)
 
         if path == '/':
             return self.root
 
+        if self._path_index is not None:
+            return self._path_index.get(path)
+
+        with self._cache_lock:
+            node = self._node_cache.get(path)
+            if node is not None:
+                self._node_cache.move_to_end(path)
+                self.cache_hits += 1
+                return node
+            self.cache_misses += 1
+
         parts = path.strip('/').split('/')
         current = self.root
 
@@ -293,9 +1473,207 @@ class VFS:
             if current is None:
                 return None
 
+        if self.cache_size:
+            with self._cache_lock:
+                self._node_cache[path] = current
+                self._cache_link(path)
+                if len(self._node_cache) > self.cache_size:
+                    evicted, _ = self._node_cache.popitem(last=False)
+                    self._cache_unlink(evicted)
+
         return current
 
-    def create_file(self, path, content="", permissions="644"):
+    @_writer
+    def get_writable_node(self, path):
+        """
+        Получить узел для изменения на месте.
+
+        Узлы на пути от корня, разделяемые со снимками (см. snapshot),
+        заменяются копиями; остальное дерево остается общим. Узлы, полученные
+        через get_node, после снимка изменять напрямую нельзя.
+
+        Args:
+            path: Путь к узлу
+
+        Returns:
+            VFSNode или None
+        """
+        path = self._resolve_cached(path)
+        node = self.get_node(path)
+        generation = self._generation
+        if node is None or node._epoch == generation:
+            # Предки узла текущего поколения тоже принадлежат этому поколению
+            return node
+
+        current = self.root
+        if current._epoch != generation:
+            self.root = current._clone(generation)
+            self._replace_cached('/', current, self.root)
+            current = self.root
+        if path == '/':
+            return current
+
+        child_path = ''
+        for part in path[1:].split('/'):
+            child_path += '/' + part
+            child = current.get_child(part)
+            if child._epoch != generation:
+                clone = child._clone(generation)
+                current._replace_child(clone)
+                self._replace_cached(child_path, child, clone)
+                child = clone
+            current = child
+        return current
+
+    def _replace_cached(self, path, old, new):
+        """
+        Заменить узел в кэше путей и индексе путей его копией.
+
+        Args:
+            path: Нормализованный путь узла
+            old: Прежний узел
+            new: Копия узла
+        """
+        if path in self._node_cache:
+            self._node_cache[path] = new
+        if self._path_index is not None:
+            self._path_index[path] = new
+            self._node_paths.pop(old, None)
+            self._node_paths[new] = path
+
+    @_writer
+    def snapshot(self):
+        """
+        Сделать снимок текущего состояния VFS за O(1).
+
+        Снимок разделяет все узлы с VFS. Последующие изменения через методы
+        VFS копируют только путь от измененного узла до корня, поэтому
+        множество снимков большого образа занимает почти столько же памяти,
+        сколько один.
+
+        Returns:
+            Snapshot: Снимок (передается в restore или from_snapshot)
+        """
+        snapshot = Snapshot(self.root, self.username, self.current_path)
+        # Все существующие узлы становятся общими со снимком
+        self._generation = next(_generations)
+        return snapshot
+
+    @_writer
+    def restore(self, snapshot):
+        """
+        Вернуть VFS к состоянию снимка.
+
+        Все дерево считается измененным: следующее сохранение изменений
+        запишет его целиком.
+
+        Args:
+            snapshot: Снимок, сделанный snapshot()
+
+        Raises:
+            RuntimeError: Если открыта транзакция
+        """
+        if self._transaction is not None:
+            raise RuntimeError("нельзя восстановить снимок внутри транзакции")
+        self.root = snapshot.root
+        self._generation = next(_generations)
+        self._node_cache.clear()
+        self._cache_children.clear()
+        if self._path_index is not None:
+            self.enable_path_index()
+        self.get_writable_node('/')._dirty |= DIRTY_NEW
+
+        node = self.get_node(self.current_path)
+        if node is None or not node.is_directory():
+            self.change_directory('/')
+
+    @classmethod
+    def from_snapshot(cls, snapshot, cache_size=PATH_CACHE_SIZE, path_index=False):
+        """
+        Создать новую VFS из снимка (дерево разделяется со снимком).
+
+        Args:
+            snapshot: Снимок, сделанный snapshot()
+            cache_size: Максимальное число путей в кэше get_node
+            path_index: Вести ли индекс абсолютных путей
+
+        Returns:
+            VFS: Независимая копия состояния снимка
+        """
+        vfs = cls(snapshot.username, cache_size)
+        vfs.root = snapshot.root
+        vfs._generation = next(_generations)
+        vfs.current_path = vfs.previous_path = snapshot.current_path
+        if path_index:
+            vfs.enable_path_index()
+        return vfs
+
+    def fork(self):
+        """
+        Создать независимую копию VFS за O(1) (снимок + from_snapshot).
+
+        Returns:
+            VFS: Копия, разделяющая неизмененные узлы с этой VFS
+        """
+        return VFS.from_snapshot(self.snapshot(), self.cache_size, self.has_path_index())
+
+    @_reader
+    def merkle_hash(self):
+        """
+        Получить хэш Меркла всего дерева (имена, права, владельцы, содержимое).
+
+        Две VFS с одинаковым хэшем совпадают с точностью до времени изменения.
+
+        Returns:
+            bytes: SHA-256
+        """
+        return self.root.merkle_hash()
+
+    def diff(self, other):
+        """
+        Сравнить VFS с другой VFS по хэшам Меркла.
+
+        Обход спускается только в поддеревья с различающимися хэшами, поэтому
+        после изменения нескольких файлов сравнение не обходит все дерево.
+        Добавленное или удаленное поддерево возвращается одной записью.
+
+        Args:
+            other: VFS, с которой сравнивается эта
+
+        Returns:
+            list: Пары (изменение, путь) в прямом порядке обхода, где изменение -
+                  'added' (узел есть только в other), 'removed' (только в этой VFS)
+                  или 'modified'
+        """
+        # Блокировки чтения берутся в общем порядке, чтобы встречные diff не ждали друг друга
+        first, second = sorted((self, other), key=id)
+        changes = []
+        with first.read_lock(), second.read_lock():
+            stack = [('/', self.root, other.root)]
+            while stack:
+                path, old, new = stack.pop()
+                if old is None:
+                    changes.append(('added', path))
+                    continue
+                if new is None:
+                    changes.append(('removed', path))
+                    continue
+                if old.merkle_hash() == new.merkle_hash():
+                    continue
+                if not (old.is_directory() and new.is_directory()):
+                    changes.append(('modified', path))
+                    continue
+                if old._meta_bytes() != new._meta_bytes():
+                    changes.append(('modified', path))
+
+                base = '' if path == '/' else path
+                old_children, new_children = old.children, new.children
+                for name in sorted(old_children.keys() | new_children.keys(), reverse=True):
+                    stack.append((f"{base}/{name}", old_children.get(name), new_children.get(name)))
+        return changes
+
+    @_writer
+    def create_file(self, path, content="", permissions="644", owner=None):
         """
         Создать файл.
 
@@ -303,57 +1681,314 @@ class VFS:
             path: Путь к файлу
             content: Содержимое файла
             permissions: Права доступа
+            owner: Владелец и группа (None - пользователь VFS)
 
         Returns:
             bool: True если создан, False если ошибка
         """
         path = self._normalize_path(path)
-        dir_path = os.path.dirname(path)
-        file_name = os.path.basename(path)
-
-        parent = self.get_node(dir_path)
-        if parent is None or not parent.is_directory():
-            return False
-
-        file_node = File(file_name, content, permissions, self.username, self.username)
-        parent.add_child(file_node)
-        return True
+        owner = owner or self.username
+        file_node = File(os.path.basename(path), content, permissions, owner, owner)
+        file_node._epoch = self._generation
+        return self._put_node(path, file_node)
 
-    def create_directory(self, path, permissions="755"):
+    @_writer
+    def create_directory(self, path, permissions="755", owner=None):
         """
         Создать директорию.
 
         Args:
             path: Путь к директории
             permissions: Права доступа
+            owner: Владелец и группа (None - пользователь VFS)
 
         Returns:
             bool: True если создана, False если ошибка
         """
         path = self._normalize_path(path)
-        dir_path = os.path.dirname(path)
-        dir_name = os.path.basename(path)
+        owner = owner or self.username
+        dir_node = Directory(os.path.basename(path), permissions, owner, owner)
+        dir_node._epoch = self._generation
+        return self._put_node(path, dir_node)
+
+    def _put_node(self, path, node):
+        """
+        Поместить узел по нормализованному пути (заменяя существующий).
+
+        Args:
+            path: Нормализованный путь
+            node: Узел, имя которого совпадает с последним компонентом пути
+
+        Returns:
+            bool: True если узел добавлен, False если нет родительской директории
+        """
+        if path == '/':
+            return False
+        parent = self.get_writable_node(os.path.dirname(path))
+        if parent is None or not parent.is_directory():
+            return False
+
+        if self._transaction is not None:
+            old = parent.get_child(node.name)
+            self._transaction.undo.append(('remove', path) if old is None else ('restore', path, old))
+
+        parent.add_child(node)
+        self._invalidate_path(path)
+        self._index_add(path, node)
+        self._log_redo(path, node)
+        return True
+
+    @_writer
+    def remove_node(self, path):
+        """
+        Удалить файл или директорию (вместе с содержимым).
+
+        Args:
+            path: Путь к узлу
+
+        Returns:
+            bool: True если удален, False если не найден
+        """
+        path = self._resolve_cached(path)
+        if path == '/':
+            return False
 
-        parent = self.get_node(dir_path)
+        parent = self.get_writable_node(os.path.dirname(path))
         if parent is None or not parent.is_directory():
             return False
 
-        dir_node = Directory(dir_name, permissions, self.username, self.username)
-        parent.add_child(dir_node)
+        name = os.path.basename(path)
+        node = parent.get_child(name)
+        if node is None:
+            return False
+        parent.remove_child(name)
+        self._invalidate_path(path)
+        self._index_remove(path)
+
+        if self._transaction is not None:
+            self._transaction.undo.append(('restore', path, node))
+            self._log_redo(path, None)
+        return True
+
+    @_reader
+    def read_file(self, path):
+        """
+        Прочитать содержимое файла.
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            str или None: Содержимое или None, если файл не найден
+        """
+        node = self.get_node(path)
+        if node is None or not node.is_file():
+            return None
+        return node.read()
+
+    @_reader
+    def list_directory(self, path, show_hidden=False):
+        """
+        Получить отсортированный список имен потомков директории.
+
+        Args:
+            path: Путь к директории
+            show_hidden: Показывать ли скрытые файлы (начинающиеся с .)
+
+        Returns:
+            list или None: Список имен или None, если директория не найдена
+        """
+        node = self.get_node(path)
+        if node is None or not node.is_directory():
+            return None
+        return node.list_children(show_hidden)
+
+    @_writer
+    def write_file(self, path, content):
+        """
+        Записать содержимое в существующий файл.
+
+        Args:
+            path: Путь к файлу
+            content: Новое содержимое (str или bytes)
+
+        Returns:
+            bool: True если записано, False если файл не найден
+        """
+        path = self._resolve_cached(path)
+        node = self.get_writable_node(path)
+        if node is None or not node.is_file():
+            return False
+
+        if self._transaction is not None:
+            self._transaction.undo.append(('write', path, node.read_bytes(), node.mtime))
+        node.write(content)
+        self._log_redo(path, node)
+        return True
+
+    @_writer
+    def chmod(self, path, permissions):
+        """
+        Изменить права доступа узла.
+
+        Args:
+            path: Путь к узлу
+            permissions: Новые права (строка из 3 цифр)
+
+        Returns:
+            bool: True если изменено, False если узел не найден
+
+        Raises:
+            ValueError: Если формат прав некорректен
+        """
+        path = self._resolve_cached(path)
+        node = self.get_writable_node(path)
+        if node is None:
+            return False
+
+        old_permissions = node.permissions
+        node.permissions = permissions
+        if self._transaction is not None:
+            self._transaction.undo.append(('chmod', path, old_permissions))
+            if self._wal is not None:
+                self._transaction.redo.append({'op': 'chmod', 'path': path, 'permissions': node.permissions})
         return True
 
+    @_writer
+    def attach_wal(self, wal):
+        """
+        Подключить журнал упреждающей записи для фиксации транзакций.
+
+        Args:
+            wal: WriteAheadLog или None (транзакции только в памяти)
+        """
+        self._wal = wal
+
+    @property
+    def wal(self):
+        """Подключенный журнал упреждающей записи (или None)."""
+        return self._wal
+
+    def in_transaction(self):
+        """Проверить, открыта ли транзакция."""
+        return self._transaction is not None
+
+    def begin(self):
+        """
+        Начать транзакцию.
+
+        Изменения через create_file, create_directory, remove_node, write_file
+        и chmod до commit/rollback применяются как единое целое.
+
+        Raises:
+            RuntimeError: Если транзакция уже начата
+        """
+        # Блокировка записи удерживается до commit/rollback
+        self._lock.acquire_write()
+        if self._transaction is not None:
+            self._lock.release_write()
+            raise RuntimeError("транзакция уже начата")
+        self._transaction = _Transaction()
+
+    @_writer
+    def commit(self):
+        """
+        Зафиксировать транзакцию (записать ее в журнал упреждающей записи, если он подключен).
+
+        Raises:
+            RuntimeError: Если транзакция не начата
+        """
+        if self._transaction is None:
+            raise RuntimeError("транзакция не начата")
+        transaction = self._transaction
+        if self._wal is not None and transaction.redo:
+            try:
+                self._wal.commit(transaction.redo)
+            except BaseException:
+                # Изменения не попали в журнал: откатываем их и снимаем блокировку
+                self.rollback()
+                raise
+        self._transaction = None
+        self._lock.release_write()
+
+    @_writer
+    def rollback(self):
+        """
+        Откатить транзакцию, применив записи отмены в обратном порядке.
+
+        Raises:
+            RuntimeError: Если транзакция не начата
+        """
+        if self._transaction is None:
+            raise RuntimeError("транзакция не начата")
+        transaction = self._transaction
+        self._transaction = None
+
+        try:
+            for undo in reversed(transaction.undo):
+                action, path = undo[0], undo[1]
+                if action == 'remove':
+                    self.remove_node(path)
+                elif action == 'restore':
+                    self._put_node(path, undo[2])
+                elif action == 'write':
+                    node = self.get_writable_node(path)
+                    node._set_data(undo[2])
+                    node._mtime = undo[3]
+                elif action == 'chmod':
+                    self.get_writable_node(path).permissions = undo[2]
+        finally:
+            self._lock.release_write()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Контекстный менеджер транзакции: commit при успехе, rollback при исключении.
+
+        Пример:
+            with vfs.transaction():
+                vfs.create_directory("/srv")
+                vfs.create_file("/srv/app.conf", "port=80\n")
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def _log_redo(self, path, node):
+        """
+        Добавить запись повтора в открытую транзакцию (если подключен журнал).
+
+        Args:
+            path: Нормализованный путь
+            node: Новый узел по этому пути или None при удалении
+        """
+        if self._transaction is None or self._wal is None:
+            return
+        if node is None:
+            record = {'op': 'remove', 'path': path}
+        else:
+            record = node_record(path, node)
+        self._transaction.redo.append(record)
+
+    @_reader
     def change_directory(self, path):
         """
         Сменить текущую директорию.
 
+        Дерево только читается; текущая директория принадлежит сеансу,
+        поэтому блокировка записи VFS не нужна.
+
         Args:
             path: Путь к новой директории
 
         Returns:
             bool: True если успешно, False если ошибка
         """
-        path = self.resolve_path(path)
-        path = self._normalize_path(path)
+        path = self._resolve_cached(path)
 
         node = self.get_node(path)
         if node is None or not node.is_directory():
@@ -366,3 +2001,41 @@ class VFS:
     def get_current_directory(self):
         """Получить текущую директорию."""
         return self.current_path
+
+    def is_dirty(self):
+        """Проверить, есть ли несохраненные изменения."""
+        return self.root.is_dirty()
+
+    @_writer
+    def mark_clean(self):
+        """Сбросить флаги изменений (после сохранения или загрузки)."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node._dirty = 0
+            if node.is_directory():
+                # Обходим только измененные ветки (и не материализуем отложенные директории)
+                stack.extend(child for child in node._children.values() if child._dirty)
+
+    def iter_dirty(self):
+        """
+        Обойти измененные узлы в прямом порядке (родитель раньше потомков).
+
+        Для узлов с флагом DIRTY_NEW возвращается все их поддерево.
+
+        Yields:
+            tuple: (путь, узел, флаги изменений)
+        """
+        stack = [('/', self.root, self.root._dirty)]
+        while stack:
+            path, node, flags = stack.pop()
+            if flags & (DIRTY_SELF | DIRTY_NEW):
+                yield path, node, flags
+            if not node.is_directory():
+                continue
+            base = '' if path == '/' else path
+            for name in reversed(node.list_children(show_hidden=True)):
+                child = node._children[name]
+                child_flags = child._dirty | (flags & DIRTY_NEW)
+                if child_flags:
+                    stack.append((f"{base}/{name}", child, child_flags))
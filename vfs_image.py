@@ -0,0 +1,360 @@
+"""Модуль бинарного формата образа VFS.
+
+Образ состоит из заголовка, пула строк, таблицы узлов фиксированного
+размера и области содержимого файлов. Запись узла хранит хэш Меркла
+директории или SHA-256 содержимого файла, поэтому сравнение образов
+(VFS.diff) не спускается в совпадающие поддеревья и не хэширует файлы. Узлы записаны в порядке обхода
+в ширину, поэтому потомки каждой директории лежат в таблице подряд.
+При загрузке файл отображается в память (mmap), и содержимое файлов
+отдается как срезы memoryview без копирования.
+
+Структура файла (little-endian):
+    заголовок    HEADER
+    пул строк    смещения (string_count + 1) x u64, затем данные UTF-8
+    узлы         node_count x NODE
+    содержимое   данные файлов подряд; одинаковое содержимое (по SHA-256)
+                 записывается один раз, и такие файлы ссылаются на одно смещение
+"""
+
+import mmap
+import os
+import stat
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+from vfs import VFS, File, Directory
+
+MAGIC = b'VFSIMG\x00\x01'
+VERSION = 2
+
+# magic, версия, число узлов, число строк, смещения секций строк, узлов и содержимого
+HEADER = struct.Struct('<8sIIQQQQ')
+
+# Тип узла, режим, индексы строк имени/владельца/группы, время изменения, поля и хэш:
+#   директория: первый потомок, число потомков, глубина, директорий, файлов, байт, хэш Меркла
+#   файл:       смещение содержимого, -, -, размер, -, -, SHA-256 содержимого
+NODE = struct.Struct('<BxHIIIqQIIQQQ32s')
+
+# Запись узла версии 1 (без хэша) - такие образы по-прежнему читаются
+NODE_V1 = struct.Struct('<BxHIIIqQIIQQQ')
+
+KIND_DIRECTORY = 0
+KIND_FILE = 1
+
+
+def is_image(path):
+    """
+    Проверить по magic-байтам, является ли файл бинарным образом VFS.
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        bool: True если файл начинается с MAGIC
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+@contextmanager
+def atomic_open(path, mode='wb', **kwargs):
+    """
+    Открыть временный файл рядом с path, который при успешной записи заменит path.
+
+    Файл сбрасывается на диск и атомарно подменяет path через os.replace, поэтому
+    отображенный в память старый файл (узлы VFS, загруженные из этого же образа)
+    остается целым, а при сбое на месте path остается прежнее содержимое.
+
+    Args:
+        path: Путь к файлу
+        mode: Режим открытия ('wb' или 'w')
+        **kwargs: Дополнительные аргументы open (encoding, errors)
+
+    Yields:
+        file: Открытый временный файл
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        try:
+            # Права как у заменяемого файла (у нового - по umask, а не 0600 mkstemp)
+            permissions = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            permissions = 0o666 & ~_UMASK
+        os.chmod(tmp_path, permissions)
+        with open(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_umask():
+    """Получить umask процесса (os.umask позволяет только заменить его)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def write_image(vfs, path):
+    """
+    Записать VFS в бинарный образ (атомарно, см. atomic_open).
+
+    Args:
+        vfs: VFS объект
+        path: Путь к файлу образа
+    """
+    strings = {}
+    records = []
+    # Уникальное содержимое файлов и его смещения: одинаковые файлы
+    # ссылаются на одну область содержимого образа
+    contents = []
+    content_offsets = {}
+    content_size = 0
+
+    def string_index(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    # Хэши Меркла всех директорий вычисляются за один обход (далее берутся из кэша)
+    vfs.root.merkle_hash()
+
+    # Обход в ширину: индекс следующего свободного места в таблице узлов
+    queue = deque([vfs.root])
+    next_index = 1
+    while queue:
+        node = queue.popleft()
+        name, owner, group = string_index(node.name), string_index(node.owner), string_index(node.group)
+        if node.is_directory():
+            names = node.list_children(show_hidden=True)
+            records.append(NODE.pack(KIND_DIRECTORY, node.mode, name, owner, group, node.mtime,
+                                     next_index, len(names), node.max_depth,
+                                     node.dir_count, node.file_count, node.total_bytes,
+                                     node.merkle_hash()))
+            next_index += len(names)
+            queue.extend(node.children[child] for child in names)
+        else:
+            data = node.read_bytes()
+            size = len(data)
+            digest = node.content_digest()
+            offset = content_offsets.get(digest)
+            if offset is None:
+                offset = content_offsets[digest] = content_size
+                contents.append(data)
+                content_size += size
+            records.append(NODE.pack(KIND_FILE, node.mode, name, owner, group, node.mtime,
+                                     offset, 0, 0, size, 0, 0, digest))
+
+    encoded = [value.encode('utf-8', 'surrogateescape') for value in strings]
+    offsets = array('Q', [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    strings_offset = HEADER.size
+    nodes_offset = strings_offset + len(offsets) * 8 + sum(len(value) for value in encoded)
+    content_offset = nodes_offset + len(records) * NODE.size
+
+    with atomic_open(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), len(encoded),
+                            strings_offset, nodes_offset, content_offset))
+        f.write(offsets.tobytes())
+        f.writelines(encoded)
+        f.writelines(records)
+        f.writelines(contents)
+
+
+class ImageReader:
+    """Чтение бинарного образа VFS, отображенного в память."""
+
+    def __init__(self, path, mtime=None):
+        """
+        Открыть образ.
+
+        Args:
+            path: Путь к файлу образа
+            mtime: Время изменения всех узлов вместо записанного в образе
+                   (None - из образа)
+
+        Raises:
+            ValueError: Если файл не является образом VFS поддерживаемой версии
+        """
+        self.mtime = mtime
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.buffer)
+
+        magic, version, self.node_count, self.string_count, \
+            self.strings_offset, self.nodes_offset, self.content_offset = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' не является бинарным образом VFS")
+        if version == VERSION:
+            self._node = NODE
+        elif version == 1:
+            self._node = NODE_V1
+        else:
+            raise ValueError(f"неподдерживаемая версия образа VFS: {version}")
+
+        offsets = self.view[self.strings_offset:self.strings_offset + (self.string_count + 1) * 8]
+        if sys.byteorder == 'little':
+            self._offsets = offsets.cast('Q')
+        else:
+            self._offsets = array('Q', offsets.tobytes())
+            self._offsets.byteswap()
+        self._strings_data = self.strings_offset + (self.string_count + 1) * 8
+        self._strings = [None] * self.string_count
+        # Срезы содержимого по смещению: файлы с общей областью разделяют один срез
+        self._contents = {}
+
+    def string(self, index):
+        """
+        Получить строку из пула (с кэшированием и интернированием).
+
+        Args:
+            index: Индекс строки
+
+        Returns:
+            str: Строка
+        """
+        value = self._strings[index]
+        if value is None:
+            start = self._strings_data + self._offsets[index]
+            end = self._strings_data + self._offsets[index + 1]
+            value = self._strings[index] = sys.intern(str(self.view[start:end], 'utf-8', 'surrogateescape'))
+        return value
+
+    def record(self, index):
+        """
+        Прочитать запись таблицы узлов.
+
+        Args:
+            index: Индекс узла
+
+        Returns:
+            tuple: Поля записи NODE (хэш None для образа версии 1)
+        """
+        node = self._node
+        fields = node.unpack_from(self.buffer, self.nodes_offset + index * node.size)
+        if node is NODE_V1:
+            fields += (None,)
+        return fields
+
+    def make_node(self, index, lazy=False):
+        """
+        Создать узел VFS по записи таблицы (без потомков для директорий).
+
+        Args:
+            index: Индекс узла
+            lazy: Отложить загрузку потомков директории до первого обращения
+
+        Returns:
+            VFSNode: File с содержимым-срезом образа или пустая Directory
+        """
+        kind, mode, name, owner, group, mtime, field, _, depth, size, files, total, digest = self.record(index)
+        permissions = f"{mode:03o}"
+        if kind == KIND_FILE:
+            content = self._contents.get(field)
+            if content is None or len(content) != size:
+                start = self.content_offset + field
+                content = self._contents[field] = self.view[start:start + size]
+            node = File(self.string(name), content, permissions,
+                        self.string(owner), self.string(group))
+            # SHA-256 содержимого из образа - без повторного хэширования
+            node._view_digest = digest
+        else:
+            node = Directory(self.string(name), permissions, self.string(owner), self.string(group))
+            node._merkle = digest
+            if lazy:
+                # Агрегаты известны из образа, потомки загрузятся при обращении
+                node._dir_count, node._file_count, node._total_bytes, node._max_depth = size, files, total, depth
+                node._pending = (self, index)
+        node._mtime = mtime if self.mtime is None else self.mtime
+        return node
+
+    def materialize(self, directory, index):
+        """
+        Загрузить непосредственных потомков директории (отложенная загрузка).
+
+        Args:
+            directory: Директория VFS
+            index: Индекс директории в образе
+        """
+        children, totals = self.children_range(index)
+        directory._restore_children([self.make_node(child, lazy=True) for child in children], totals)
+
+    def restore_root(self, root):
+        """
+        Перенести метаданные корня образа в корневую директорию VFS.
+
+        Args:
+            root: Корневая директория VFS
+        """
+        image_root = self.make_node(0)
+        root._mode = image_root._mode
+        root._owner = image_root._owner
+        root._group = image_root._group
+        root._mtime = image_root._mtime
+        root._merkle = image_root._merkle
+
+    def children_range(self, index):
+        """
+        Получить диапазон индексов потомков директории и агрегаты поддерева.
+
+        Args:
+            index: Индекс директории
+
+        Returns:
+            tuple: (range индексов потомков, (директорий, файлов, байт, глубина))
+        """
+        _, _, _, _, _, _, first, count, depth, dirs, files, size, _ = self.record(index)
+        return range(first, first + count), (dirs, files, size, depth)
+
+    def load(self, username="user", lazy=False):
+        """
+        Загрузить образ в VFS.
+
+        Args:
+            username: Имя пользователя
+            lazy: Загружать директории только при первом обращении к ним
+                  (время запуска не зависит от размера образа)
+
+        Returns:
+            VFS: Загруженная виртуальная файловая система
+        """
+        vfs = VFS(username)
+        self.restore_root(vfs.root)
+        if lazy:
+            _, totals = self.children_range(0)
+            vfs.root._dir_count, vfs.root._file_count, vfs.root._total_bytes, vfs.root._max_depth = totals
+            vfs.root._pending = (self, 0)
+            return vfs
+
+        queue = deque([(0, vfs.root)])
+        while queue:
+            index, directory = queue.popleft()
+            children, totals = self.children_range(index)
+            nodes = [self.make_node(child) for child in children]
+            directory._restore_children(nodes, totals)
+            for child_index, node in zip(children, nodes):
+                if node.is_directory():
+                    queue.append((child_index, node))
+        return vfs
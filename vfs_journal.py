@@ -0,0 +1,332 @@
+"""Модуль журнала изменений VFS (инкрементальное сохранение).
+
+Вместо полной перезаписи образа изменения дописываются в журнал рядом
+с ним (<образ>.journal). Каждая строка журнала - JSON запись об одном узле:
+
+    {"op": "dir", "path": ..., "permissions": ..., "owner": ..., "group": ...,
+     "mtime": ..., "children": [...]}
+    {"op": "file", "path": ..., "permissions": ..., "owner": ..., "group": ...,
+     "mtime": ..., "content": <base64>}
+
+Записи директорий содержат полный список имен потомков: при воспроизведении
+потомки, которых нет в списке, удаляются. Загрузчик воспроизводит журнал
+поверх базового образа; при уплотнении образ перезаписывается целиком,
+а журнал удаляется.
+
+Журнал упреждающей записи (<образ>.wal) хранит зафиксированные транзакции
+VFS теми же записями (плюс {"op": "remove"} и {"op": "chmod"}), каждая
+транзакция завершается маркером фиксации. При загрузке воспроизводятся
+только транзакции с маркером.
+"""
+
+import base64
+import json
+import os
+
+JOURNAL_SUFFIX = '.journal'
+WAL_SUFFIX = '.wal'
+
+
+def journal_path(image_path):
+    """Получить путь к журналу изменений для образа."""
+    return image_path + JOURNAL_SUFFIX
+
+
+def wal_path(image_path):
+    """Получить путь к журналу упреждающей записи для образа."""
+    return image_path + WAL_SUFFIX
+
+
+def truncate_torn_tail(path):
+    """
+    Обрезать оборванную последнюю строку журнала (сбой во время записи).
+
+    Без этого следующая запись дописалась бы к обрывку и тоже не читалась бы.
+
+    Args:
+        path: Путь к файлу журнала
+
+    Returns:
+        int: Число отброшенных байт (0, если журнала нет или он цел)
+    """
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return 0
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        # Ищем последний перевод строки с конца файла блоками
+        while end > 0:
+            start = max(0, end - 64 * 1024)
+            f.seek(start)
+            block = f.read(end - start)
+            if end == size and block.endswith(b'\n'):
+                return 0
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        f.truncate(end)
+        f.flush()
+        os.fsync(f.fileno())
+        return size - end
+
+
+def node_record(path, node):
+    """
+    Сформировать запись журнала для узла.
+
+    Args:
+        path: Абсолютный путь узла
+        node: Узел VFS
+
+    Returns:
+        dict: Запись журнала
+    """
+    record = {
+        'op': 'dir' if node.is_directory() else 'file',
+        'path': path,
+        'permissions': node.permissions,
+        'owner': node.owner,
+        'group': node.group,
+        'mtime': node.mtime,
+    }
+    if node.is_directory():
+        record['children'] = node.list_children(show_hidden=True)
+    else:
+        record['content'] = base64.b64encode(node.read_bytes()).decode('ascii')
+    return record
+
+
+def collect_changes(vfs):
+    """
+    Собрать записи журнала для всех измененных узлов VFS.
+
+    Args:
+        vfs: VFS объект
+
+    Returns:
+        list: Записи журнала в порядке воспроизведения
+    """
+    return [node_record(path, node) for path, node, _ in vfs.iter_dirty()]
+
+
+def apply_record(vfs, record):
+    """
+    Применить запись журнала к VFS.
+
+    Args:
+        vfs: VFS объект
+        record: Запись журнала
+
+    Raises:
+        ValueError: Если запись некорректна или родительская директория не найдена
+    """
+    path = record['path']
+
+    if record['op'] == 'remove':
+        vfs.remove_node(path)
+        return
+
+    if record['op'] == 'chmod':
+        if not vfs.chmod(path, record['permissions']):
+            raise ValueError(f"узел не найден: '{path}'")
+        return
+
+    node = vfs.get_node(path)
+
+    if record['op'] == 'dir':
+        if node is not None and not node.is_directory():
+            vfs.remove_node(path)
+            node = None
+        if node is None:
+            if not vfs.create_directory(path, record['permissions']):
+                raise ValueError(f"не найдена родительская директория для '{path}'")
+            node = vfs.get_node(path)
+        if 'children' in record:
+            keep = set(record['children'])
+            base = '' if path == '/' else path
+            for name in node.list_children(show_hidden=True):
+                if name not in keep:
+                    vfs.remove_node(f"{base}/{name}")
+
+    elif record['op'] == 'file':
+        content = base64.b64decode(record['content'])
+        if node is not None and node.is_file():
+            vfs.write_file(path, content)
+        else:
+            if node is not None:
+                vfs.remove_node(path)
+            if not vfs.create_file(path, content, record['permissions']):
+                raise ValueError(f"не найдена родительская директория для '{path}'")
+
+    else:
+        raise ValueError(f"неизвестная операция журнала: '{record['op']}'")
+
+    # Узлы могут разделяться со снимками - изменяем только через копию пути
+    node = vfs.get_writable_node(path)
+    node.permissions = record['permissions']
+    node.owner = record['owner']
+    node.group = record['group']
+    node.modified_time = record['mtime']
+
+
+class DeltaJournal:
+    """Журнал инкрементальных изменений образа VFS."""
+
+    def __init__(self, image_path):
+        """
+        Инициализация журнала.
+
+        Args:
+            image_path: Путь к базовому образу (XML или бинарному)
+        """
+        self.image_path = image_path
+        self.path = journal_path(image_path)
+
+    def exists(self):
+        """Проверить, есть ли журнал на диске."""
+        return os.path.exists(self.path)
+
+    def size(self):
+        """Получить размер журнала в байтах (0, если журнала нет)."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, records):
+        """
+        Дописать записи в журнал и сбросить их на диск.
+
+        Args:
+            records: Записи журнала
+        """
+        if not records:
+            return
+        truncate_torn_tail(self.path)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self, vfs):
+        """
+        Воспроизвести журнал поверх загруженного образа.
+
+        Оборванная последняя строка (сбой во время записи) обрезается,
+        нечитаемые строки пропускаются.
+
+        Args:
+            vfs: VFS, загруженная из базового образа
+
+        Returns:
+            int: Количество примененных записей
+        """
+        truncate_torn_tail(self.path)
+        if not self.exists():
+            return 0
+        applied = 0
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                apply_record(vfs, record)
+                applied += 1
+        return applied
+
+    def remove(self):
+        """Удалить журнал (после полной записи образа)."""
+        if self.exists():
+            os.remove(self.path)
+
+
+class WriteAheadLog:
+    """Журнал упреждающей записи для транзакций VFS (только дописывание)."""
+
+    def __init__(self, path):
+        """
+        Инициализация журнала.
+
+        Args:
+            path: Путь к файлу журнала
+        """
+        self.path = path
+        self._next_id = 1
+
+    def commit(self, records):
+        """
+        Записать транзакцию с маркером фиксации и сбросить ее на диск.
+
+        Args:
+            records: Записи повтора транзакции
+        """
+        tx_id = self._next_id
+        self._next_id += 1
+        lines = [json.dumps({'tx': tx_id, 'record': record}, ensure_ascii=False) for record in records]
+        lines.append(json.dumps({'tx': tx_id, 'commit': True}))
+        truncate_torn_tail(self.path)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self, vfs):
+        """
+        Воспроизвести зафиксированные транзакции (восстановление после сбоя).
+
+        Транзакции без маркера фиксации (оборванные сбоем) пропускаются,
+        оборванная последняя строка обрезается. Нечитаемая строка тоже
+        пропускается, но транзакции, которым она могла принадлежать (открытые
+        к этому моменту и следующая начатая), не применяются: частично
+        примененная транзакция хуже пропущенной.
+
+        Args:
+            vfs: VFS объект
+
+        Returns:
+            int: Количество воспроизведенных транзакций
+        """
+        truncate_torn_tail(self.path)
+        if not os.path.exists(self.path):
+            return 0
+        pending = {}
+        broken = set()
+        # Нечитаемая строка могла быть первой записью следующей транзакции
+        break_next = False
+        applied = 0
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    tx_id = entry['tx']
+                except (ValueError, KeyError, TypeError):
+                    broken.update(pending)
+                    break_next = True
+                    continue
+                self._next_id = max(self._next_id, tx_id + 1)
+                if break_next and tx_id not in pending:
+                    broken.add(tx_id)
+                    break_next = False
+                if entry.get('commit'):
+                    records = pending.pop(tx_id, [])
+                    if tx_id in broken:
+                        continue
+                    for record in records:
+                        apply_record(vfs, record)
+                    applied += 1
+                elif 'record' in entry:
+                    pending.setdefault(tx_id, []).append(entry['record'])
+        return applied
+
+    def checkpoint(self):
+        """Очистить журнал после того, как изменения сохранены в образе или журнале изменений."""
+        if os.path.exists(self.path):
+            with open(self.path, 'w', encoding='utf-8'):
+                pass
+        self._next_id = 1
@@ -2,12 +2,49 @@
 
 import xml.etree.ElementTree as ET
 import base64
+import os
+import re
+import vfs_image
 from vfs import VFS, File, Directory
+from vfs_journal import DeltaJournal, WriteAheadLog, collect_changes, wal_path
+
+# Управляющие символы, кроме \t, \n и \r
+_BINARY_BYTES = re.compile(b'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _escape_cdata(text):
+    """Экранировать текстовое содержимое элемента так же, как ElementTree."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _escape_attrib(text):
+    """Экранировать значение атрибута так же, как ElementTree."""
+    text = _escape_cdata(text)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
 
 
 class VFSLoader:
     """Класс для загрузки и сохранения VFS."""
 
+    # Журнал уплотняется, когда превышает эту долю размера образа...
+    COMPACT_RATIO = 0.5
+    # ...но не раньше, чем достигнет этого размера в байтах
+    COMPACT_MIN_BYTES = 64 * 1024
+
     @staticmethod
     def create_default_vfs(username="user"):
         """
@@ -39,34 +76,379 @@ class VFSLoader:
         return vfs
 
     @staticmethod
-    def load_from_xml(xml_path, username="user"):
+    def load(path, username="user", path_index=False, lazy=False, cache=None):
+        """
+        Загрузить VFS, определив формат файла (XML или бинарный образ) по magic-байтам.
+
+        Args:
+            path: Путь к файлу VFS
+            username: Имя пользователя
+            path_index: Построить индекс абсолютных путей после загрузки
+            lazy: Отложенная загрузка директорий (для бинарных образов и XML из кэша:
+                  в самом XML нет произвольного доступа, он загружается целиком)
+            cache: ImageCache для повторного использования разобранного XML (None - без кэша)
+
+        Returns:
+            VFS: Загруженная виртуальная файловая система
+        """
+        if vfs_image.is_image(path):
+            return VFSLoader.load_from_binary(path, username, path_index, lazy)
+        if cache is None:
+            return VFSLoader.load_from_xml(path, username, path_index)
+
+        try:
+            vfs = cache.load(path, VFSLoader._read_xml, username, lazy)
+            return VFSLoader._finish_load(vfs, path, path_index)
+
+        except Exception as e:
+            print(f"Ошибка при загрузке VFS из XML: {e}")
+            print("Создается VFS по умолчанию")
+            return VFSLoader.create_default_vfs(username)
+
+    @staticmethod
+    def load_from_binary(image_path, username="user", path_index=False, lazy=False):
+        """
+        Загрузить VFS из бинарного образа (файл отображается в память).
+
+        Содержимое файлов не копируется: File хранит срез memoryview образа
+        и декодирует его только при первом чтении.
+
+        Args:
+            image_path: Путь к файлу образа
+            username: Имя пользователя
+            path_index: Построить индекс абсолютных путей после загрузки
+            lazy: Создавать потомков директории только при первом обращении к ней
+
+        Returns:
+            VFS: Загруженная виртуальная файловая система
+        """
+        try:
+            vfs = vfs_image.ImageReader(image_path).load(username, lazy)
+            return VFSLoader._finish_load(vfs, image_path, path_index)
+
+        except Exception as e:
+            print(f"Ошибка при загрузке VFS из бинарного образа: {e}")
+            print("Создается VFS по умолчанию")
+            return VFSLoader.create_default_vfs(username)
+
+    @staticmethod
+    def save_to_binary(vfs, image_path):
+        """
+        Сохранить VFS в бинарный образ.
+
+        Args:
+            vfs: VFS объект
+            image_path: Путь к файлу образа
+
+        Returns:
+            bool: True если успешно, False если ошибка
+        """
+        try:
+            vfs_image.write_image(vfs, image_path)
+            VFSLoader._full_image_saved(vfs, image_path)
+            return True
+
+        except Exception as e:
+            print(f"Ошибка при сохранении VFS в бинарный образ: {e}")
+            return False
+
+    @staticmethod
+    def convert_xml_to_binary(xml_path, image_path):
+        """
+        Преобразовать XML файл VFS в бинарный образ.
+
+        Args:
+            xml_path: Путь к XML файлу
+            image_path: Путь к создаваемому образу
+
+        Returns:
+            bool: True если успешно, False если ошибка
+        """
+        # Без load_from_xml: при ошибке он подставил бы VFS по умолчанию
+        try:
+            vfs = VFSLoader._read_xml(xml_path)
+        except Exception as e:
+            print(f"Ошибка при загрузке VFS из XML: {e}")
+            return False
+        return VFSLoader.save_to_binary(vfs, image_path)
+
+    @staticmethod
+    def convert_binary_to_xml(image_path, xml_path):
+        """
+        Преобразовать бинарный образ VFS в XML файл.
+
+        Args:
+            image_path: Путь к образу
+            xml_path: Путь к создаваемому XML файлу
+
+        Returns:
+            bool: True если успешно, False если ошибка
+        """
+        # Без load_from_binary: при ошибке он подставил бы VFS по умолчанию
+        try:
+            vfs = vfs_image.ImageReader(image_path).load()
+        except Exception as e:
+            print(f"Ошибка при загрузке VFS из бинарного образа: {e}")
+            return False
+        return VFSLoader.save_to_xml(vfs, xml_path)
+
+    @staticmethod
+    def load_from_xml(xml_path, username="user", path_index=False, streaming=True):
         """
         Загрузить VFS из XML файла.
 
         Args:
             xml_path: Путь к XML файлу
             username: Имя пользователя
+            path_index: Построить индекс абсолютных путей после загрузки
+            streaming: Разбирать XML потоково (без построения полного дерева элементов)
 
         Returns:
             VFS: Загруженная виртуальная файловая система
         """
         try:
+            vfs = VFSLoader._read_xml(xml_path, username, streaming)
+            return VFSLoader._finish_load(vfs, xml_path, path_index)
+
+        except Exception as e:
+            print(f"Ошибка при загрузке VFS из XML: {e}")
+            print("Создается VFS по умолчанию")
+            return VFSLoader.create_default_vfs(username)
+
+    @staticmethod
+    def _finish_load(vfs, path, path_index=False):
+        """
+        Завершить загрузку: воспроизвести журналы и подключить журнал упреждающей записи.
+
+        Изменения из журнала изменений уже сохранены и считаются чистыми;
+        транзакции из журнала упреждающей записи остаются несохраненными
+        до следующего save_delta/compact.
+
+        Args:
+            vfs: VFS, загруженная из базового образа
+            path: Путь к базовому образу
+            path_index: Построить индекс абсолютных путей
+
+        Returns:
+            VFS: Готовая к работе VFS
+        """
+        vfs.mark_clean()
+        try:
+            DeltaJournal(path).replay(vfs)
+        except Exception as e:
+            print(f"Ошибка при воспроизведении журнала изменений VFS: {e}")
+        vfs.mark_clean()
+
+        wal = WriteAheadLog(wal_path(path))
+        try:
+            wal.replay(vfs)
+        except Exception as e:
+            print(f"Ошибка при восстановлении транзакций VFS: {e}")
+        vfs.attach_wal(wal)
+
+        if path_index:
+            vfs.enable_path_index()
+
+        return vfs
+
+    @staticmethod
+    def save_delta(vfs, image_path, compact_ratio=None):
+        """
+        Сохранить только изменения VFS в журнал рядом с образом.
+
+        Записываются узлы, измененные с момента загрузки или прошлого сохранения.
+        Если журнал становится слишком большим, образ уплотняется (см. compact).
+
+        Args:
+            vfs: VFS объект, загруженный из image_path
+            image_path: Путь к базовому образу (XML или бинарному)
+            compact_ratio: Порог уплотнения как доля размера образа
+                           (None - VFSLoader.COMPACT_RATIO)
+
+        Returns:
+            bool: True если успешно, False если ошибка
+        """
+        try:
+            journal = DeltaJournal(image_path)
+            journal.append(collect_changes(vfs))
+            vfs.mark_clean()
+            VFSLoader._checkpoint_wal(vfs, image_path)
+
+            if compact_ratio is None:
+                compact_ratio = VFSLoader.COMPACT_RATIO
+            threshold = max(VFSLoader.COMPACT_MIN_BYTES, compact_ratio * os.path.getsize(image_path))
+            if journal.size() > threshold:
+                return VFSLoader.compact(vfs, image_path)
+            return True
+
+        except Exception as e:
+            print(f"Ошибка при сохранении изменений VFS: {e}")
+            return False
+
+    @staticmethod
+    def compact(vfs, image_path):
+        """
+        Уплотнить образ: перезаписать его целиком и удалить журнал изменений.
+
+        Формат образа (XML или бинарный) сохраняется. Новый образ пишется во
+        временный файл и атомарно заменяет старый, поэтому отображенный в
+        память старый образ остается доступным до конца работы.
+
+        Args:
+            vfs: VFS объект
+            image_path: Путь к базовому образу
+
+        Returns:
+            bool: True если успешно, False если ошибка
+        """
+        # Полная запись атомарна и сама удаляет журнал изменений и очищает
+        # журнал упреждающей записи (см. _full_image_saved)
+        if vfs_image.is_image(image_path):
+            saved = VFSLoader.save_to_binary(vfs, image_path)
+        else:
+            saved = VFSLoader.save_to_xml(vfs, image_path)
+        if saved:
+            vfs.mark_clean()
+        return saved
+
+    @staticmethod
+    def diff(path_a, path_b, username="user", cache=None):
+        """
+        Сравнить два образа (XML или бинарных) по хэшам Меркла (см. VFS.diff).
+
+        Образы загружаются в отложенном режиме, где это возможно.
+
+        Args:
+            path_a: Путь к первому образу
+            path_b: Путь ко второму образу
+            username: Имя пользователя
+            cache: ImageCache для повторного использования разобранного XML
+
+        Returns:
+            list: Пары (изменение, путь) - изменения второго образа относительно первого
+        """
+        vfs_a = VFSLoader.load(path_a, username, lazy=True, cache=cache)
+        vfs_b = VFSLoader.load(path_b, username, lazy=True, cache=cache)
+        return vfs_a.diff(vfs_b)
+
+    @staticmethod
+    def _full_image_saved(vfs, image_path):
+        """
+        Удалить журнал изменений и очистить журнал упреждающей записи после
+        полной записи образа.
+
+        Журналы описывают прежнее содержимое образа: воспроизведенные поверх
+        нового, они вернули бы старые данные или удалили бы узлы, добавленные
+        после них. Если образ - базовый для VFS, ее узлы становятся чистыми.
+
+        Args:
+            vfs: Сохраненная VFS
+            image_path: Путь к записанному образу
+        """
+        DeltaJournal(image_path).remove()
+        if vfs.wal is not None and vfs.wal.path == wal_path(image_path):
+            vfs.mark_clean()
+        wal = vfs.wal
+        if wal is None or wal.path != wal_path(image_path):
+            wal = WriteAheadLog(wal_path(image_path))
+        wal.checkpoint()
+
+    @staticmethod
+    def _checkpoint_wal(vfs, image_path):
+        """
+        Очистить журнал упреждающей записи образа: его транзакции уже сохранены.
+
+        Args:
+            vfs: VFS объект
+            image_path: Путь к базовому образу
+        """
+        if vfs.wal is not None and vfs.wal.path == wal_path(image_path):
+            vfs.wal.checkpoint()
+
+    @staticmethod
+    def _read_xml(xml_path, username="user", streaming=True):
+        """
+        Разобрать XML файл в VFS (без обработки ошибок).
+
+        Args:
+            xml_path: Путь к XML файлу
+            username: Имя пользователя
+            streaming: Разбирать XML потоково
+
+        Returns:
+            VFS: Загруженная виртуальная файловая система
+        """
+        vfs = VFS(username)
+
+        if streaming:
+            VFSLoader._load_streaming(xml_path, vfs)
+        else:
             tree = ET.parse(xml_path)
             root_elem = tree.getroot()
 
-            vfs = VFS(username)
-
             # Загружаем корневую директорию
             if root_elem.tag == 'filesystem':
                 for child in root_elem:
                     VFSLoader._load_node(child, vfs.root, vfs)
 
-            return vfs
+        return vfs
+
+    @staticmethod
+    def _load_streaming(xml_path, vfs):
+        """
+        Загрузить содержимое XML в VFS потоково.
 
-        except Exception as e:
-            print(f"Ошибка при загрузке VFS из XML: {e}")
-            print("Создается VFS по умолчанию")
-            return VFSLoader.create_default_vfs(username)
+        Узлы VFS создаются по мере разбора, а обработанные XML элементы сразу
+        удаляются, поэтому в памяти одновременно находится только текущая
+        ветка документа, а не все дерево элементов.
+
+        Args:
+            xml_path: Путь к XML файлу
+            vfs: VFS объект
+        """
+        # Для каждого открытого элемента: директория VFS, в которую попадают
+        # его потомки (None - потомки игнорируются), и сам XML элемент
+        targets = []
+        elements = []
+
+        for event, elem in ET.iterparse(xml_path, events=('start', 'end')):
+            if event == 'start':
+                if not targets:
+                    # Корневой элемент документа
+                    target = vfs.root if elem.tag == 'filesystem' else None
+                else:
+                    parent_dir = targets[-1]
+                    target = None
+                    if parent_dir is not None and elem.tag == 'directory':
+                        name = elem.get('name', 'unnamed')
+                        if name == '/':
+                            # Корневая директория "/" сливается с родителем
+                            target = parent_dir
+                        else:
+                            target = Directory(name, elem.get('permissions', '755'),
+                                               elem.get('owner', vfs.username),
+                                               elem.get('group', vfs.username))
+                            parent_dir.add_child(target)
+                targets.append(target)
+                elements.append(elem)
+                continue
+
+            targets.pop()
+            elements.pop()
+            if not targets:
+                break
+
+            parent_dir = targets[-1]
+            if elem.tag == 'file' and parent_dir is not None:
+                VFSLoader._load_node(elem, parent_dir, vfs)
+
+            # Содержимое файла нужно до закрытия самого файла
+            parent_elem = elements[-1]
+            if parent_elem.tag != 'file':
+                # iterparse читает вперед, и у родителя уже могут быть следующие,
+                # еще открытые потомки: удаляем именно закрытый элемент
+                elem.clear()
+                parent_elem.remove(elem)
 
     @staticmethod
     def _load_node(xml_node, parent_dir, vfs):
@@ -105,29 +487,44 @@ class VFSLoader:
 
                 if encoding == 'base64':
                     try:
-                        content = base64.b64decode(content_elem.text or "").decode('utf-8')
+                        # Содержимое хранится в байтах как есть, без декодирования в строку
+                        content = base64.b64decode(content_elem.text or "")
                     except Exception as e:
                         print(f"Ошибка декодирования base64 для файла {name}: {e}")
                         content = ""
                 else:
                     content = content_elem.text or ""
 
+            # File помещает содержимое в общее хранилище blob_store.STORE:
+            # одинаковые файлы в разных директориях разделяют один объект bytes
             file_node = File(name, content, permissions, owner, group)
             parent_dir.add_child(file_node)
 
     @staticmethod
-    def save_to_xml(vfs, xml_path):
+    def save_to_xml(vfs, xml_path, streaming=True):
         """
         Сохранить VFS в XML файл.
 
         Args:
             vfs: VFS объект
             xml_path: Путь к XML файлу
+            streaming: Писать XML напрямую в файл за один обход VFS
+                       (без построения дерева элементов)
 
         Returns:
             bool: True если успешно, False если ошибка
         """
         try:
+            if streaming:
+                # Тот же формат и кодировка, что и у ElementTree.write; файл
+                # заменяется атомарно, как и бинарный образ (см. vfs_image.atomic_open)
+                with vfs_image.atomic_open(xml_path, 'w', encoding='utf-8', errors='xmlcharrefreplace') as f:
+                    f.write("<?xml version='1.0' encoding='utf-8'?>\n<filesystem>\n  ")
+                    VFSLoader._write_node(f.write, vfs.root, 1)
+                    f.write("\n</filesystem>\n")
+                VFSLoader._full_image_saved(vfs, xml_path)
+                return True
+
             root_elem = ET.Element('filesystem')
 
             # Сохраняем корневую директорию
@@ -138,7 +535,9 @@ class VFSLoader:
 
             # Записываем в файл
             tree = ET.ElementTree(root_elem)
-            tree.write(xml_path, encoding='utf-8', xml_declaration=True)
+            with vfs_image.atomic_open(xml_path) as f:
+                tree.write(f, encoding='utf-8', xml_declaration=True)
+            VFSLoader._full_image_saved(vfs, xml_path)
 
             return True
 
@@ -166,10 +565,10 @@ class VFSLoader:
             else:
                 dir_elem = parent_elem
 
-            # Рекурсивно сохраняем дочерние элементы
-            for child_name in sorted(node.children.keys()):
+            # Рекурсивно сохраняем дочерние элементы (вложенные директории - всегда элементами)
+            for child_name in node.list_children(show_hidden=True):
                 child = node.children[child_name]
-                VFSLoader._save_node(child, dir_elem)
+                VFSLoader._save_node(child, dir_elem, save_root=True)
 
         elif node.is_file():
             file_elem = ET.SubElement(parent_elem, 'file')
@@ -179,21 +578,81 @@ class VFSLoader:
             file_elem.set('group', node.group)
 
             # Сохраняем содержимое
-            if node.content:
+            data = node.read_bytes()
+            if data:
                 content_elem = ET.SubElement(file_elem, 'content')
                 # Используем base64 только если есть непечатные символы (не UTF-8 текст)
                 # Проверяем наличие непечатных символов (кроме \n, \r, \t)
-                has_binary = any(ord(c) < 32 and c not in '\n\r\t' for c in node.content)
-
-                if has_binary:
+                if VFSLoader._is_binary(data):
                     # Бинарные данные - используем base64
-                    content_elem.text = base64.b64encode(node.content.encode('utf-8')).decode('ascii')
+                    content_elem.text = base64.b64encode(data).decode('ascii')
                     content_elem.set('encoding', 'base64')
                 else:
                     # Текстовые данные (включая UTF-8) - сохраняем как текст
-                    content_elem.text = node.content
+                    content_elem.text = str(data, 'utf-8')
                     content_elem.set('encoding', 'text')
 
+    @staticmethod
+    def _write_node(write, node, level):
+        """
+        Рекурсивно записать узел в XML (потоковая запись).
+
+        Вывод совпадает байт в байт с _save_node + _indent + ElementTree.write.
+
+        Args:
+            write: Функция записи строки
+            node: VFSNode
+            level: Уровень вложенности элемента
+        """
+        tag = 'directory' if node.is_directory() else 'file'
+        write(f'<{tag} name="{_escape_attrib(node.name)}" permissions="{node.permissions}" '
+              f'owner="{_escape_attrib(node.owner)}" group="{_escape_attrib(node.group)}"')
+
+        child_indent = "\n" + "  " * (level + 1)
+        if node.is_directory():
+            names = node.list_children(show_hidden=True)
+            if not names:
+                write(" />")
+                return
+            write(">")
+            for name in names:
+                write(child_indent)
+                VFSLoader._write_node(write, node.children[name], level + 1)
+        else:
+            data = node.read_bytes()
+            if not data:
+                write(" />")
+                return
+            write(">" + child_indent)
+            if VFSLoader._is_binary(data):
+                write('<content encoding="base64">')
+                write(base64.b64encode(data).decode('ascii'))
+            else:
+                write('<content encoding="text">')
+                write(_escape_cdata(str(data, 'utf-8')))
+            write("</content>")
+
+        write("\n" + "  " * level + f"</{tag}>")
+
+    @staticmethod
+    def _is_binary(data):
+        """
+        Проверить, нужно ли сохранять содержимое в base64.
+
+        Args:
+            data: Содержимое файла в байтах
+
+        Returns:
+            bool: True если есть управляющие символы (кроме \\n, \\r, \\t) или это не UTF-8
+        """
+        if _BINARY_BYTES.search(data):
+            return True
+        try:
+            str(data, 'utf-8')
+        except UnicodeDecodeError:
+            return True
+        return False
+
     @staticmethod
     def _indent(elem, level=0):
         """